@@ -28,6 +28,7 @@ The module does not provide notifications about configuration parameter changes.
 
 import errno
 from datetime import datetime
+import functools
 import json
 import os
 import re
@@ -112,6 +113,17 @@ def set_opt(name, value):
         __rc_file_update_after_idle()
 
 
+@functools.lru_cache(maxsize=8)
+def get_seed_regexp(pat):
+    """
+    Return the given seed pattern compiled for matching on raw trace output.
+    Results are cached, so that the pattern is compiled only once per change
+    of configuration, rather than for each test case result. Raises re.error
+    for invalid patterns.
+    """
+    return re.compile(pat.encode(), re.MULTILINE)
+
+
 def update_prev_exe_file_list(path):
     """
     Add the given path to the list of previously used executable files, or move
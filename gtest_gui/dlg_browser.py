@@ -91,7 +91,11 @@ def show_trace_snippet(file_name, file_off, length, is_extern_import):
 
 
 def show_trace(file_name):
-    """ Display the complete given trace file in the configured external trace browser. """
+    """
+    Display the complete given trace file in the configured external trace
+    browser. Only the file name is passed, so the file content is not read by
+    this application.
+    """
     browser_cmd = config_db.get_opt("log_browser")
     if browser_cmd:
         ProcMonitor.create(re.split(r"\s+", browser_cmd) + [file_name], "", None)
@@ -182,10 +186,10 @@ def export_traces(tk_top, log_idx_sel):
         file_idx = 0
         for log_idx in log_idx_sel:
             log = test_db.test_results[log_idx]
-            if log[4]:
-                txt = trace_db.extract_trace(log[4], log[5], log[6])
+            if log.trace_file:
+                txt = trace_db.extract_trace(log.trace_file, log.trace_offs, log.trace_len)
                 if txt:
-                    filename = "trace.%d.%s" % (file_idx, log[0])
+                    filename = "trace.%d.%s" % (file_idx, log.tc_name)
                     abs_filename = os.path.join(tempdir, filename)
                     try:
                         with open(abs_filename, "w") as file_obj:
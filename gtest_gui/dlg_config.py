@@ -178,7 +178,7 @@ class ConfigDialog:
 
     def __check_seed_pattern(self, seed_exp):
         try:
-            re.compile(seed_exp)
+            config_db.get_seed_regexp(seed_exp)
         except re.error as exc:
             tk_messagebox.showerror(
                 parent=self.wid_top,
@@ -210,7 +210,7 @@ class ConfigDialog:
 
     @staticmethod
     def __normalize_shell_cmd(var):
-        return re.sub(r"\s+", " ", var.get()).strip()
+        return " ".join(var.get().split())
 
 
     def __apply_config(self):
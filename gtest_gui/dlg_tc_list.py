@@ -21,13 +21,13 @@
 Implements the test case list dialog class.
 """
 
+import bisect
 from enum import Enum
 import os
 import tkinter as tk
 from tkinter import messagebox as tk_messagebox
 from tkinter import filedialog as tk_filedialog
 
-import gtest_gui.bisect as bisect
 import gtest_gui.config_db as config_db
 import gtest_gui.filter_expr as filter_expr
 import gtest_gui.gtest_ctrl as gtest_ctrl
@@ -84,6 +84,7 @@ class TcListDialog:
         self.test_ctrl = test_ctrl
         self.table_header_txt = ("Run", "Name", "Passed", "Failed", "Exec time")
         self.opt_sort_modes = []
+        self.sort_keys = []
         self.tc_enabled = []
 
         self.__create_dialog_window()
@@ -254,33 +255,35 @@ class TcListDialog:
 
         if line_idx is None:
             if self.__matches_filter(tc_name):
-                line_idx = bisect.bisect_left(self.tc_list_sorted, tc_name,
-                                              self.__get_sort_key_fn())
-                self.__insert_single(tc_name, line_idx)
+                sort_key = self.__get_sort_key_fn()(tc_name)
+                line_idx = bisect.bisect_left(self.sort_keys, sort_key)
+                self.__insert_single(tc_name, line_idx, sort_key)
         else:
             if self.__matches_filter(tc_name):
-                if self.__check_sort_order(tc_name, line_idx):
-                    self.__replace_single(tc_name, line_idx)
+                sort_key = self.__get_sort_key_fn()(tc_name)
+                if self.__check_sort_order(sort_key, line_idx):
+                    self.__replace_single(tc_name, line_idx, sort_key)
                 else:
                     self.__delete_single(line_idx)
-                    line_idx = bisect.bisect_left(self.tc_list_sorted, tc_name,
-                                                  self.__get_sort_key_fn())
-                    self.__insert_single(tc_name, line_idx)
+                    line_idx = bisect.bisect_left(self.sort_keys, sort_key)
+                    self.__insert_single(tc_name, line_idx, sort_key)
             else:
                 self.__delete_single(line_idx)
 
 
-    def __replace_single(self, tc_name, line_idx):
+    def __replace_single(self, tc_name, line_idx, sort_key):
         txt = self.__format_table_row(tc_name)
         self.wid_table.replace("%d.0" % (line_idx + 1), "%d.0" % (line_idx + 2), *txt)
+        self.sort_keys[line_idx] = sort_key
         self.sel_obj.text_sel_show_selection()
 
 
-    def __insert_single(self, tc_name, line_idx):
+    def __insert_single(self, tc_name, line_idx, sort_key):
         txt = self.__format_table_row(tc_name)
         self.wid_table.insert("%d.0" % (line_idx + 1), *txt)
 
         self.tc_list_sorted.insert(line_idx, tc_name)
+        self.sort_keys.insert(line_idx, sort_key)
         self.sel_obj.text_sel_adjust_insert(line_idx)
 
 
@@ -290,6 +293,7 @@ class TcListDialog:
         self.wid_table.delete(line_1, line_2)
 
         del self.tc_list_sorted[line_idx]
+        del self.sort_keys[line_idx]
         self.sel_obj.text_sel_adjust_deletion(line_idx)
 
 
@@ -337,6 +341,10 @@ class TcListDialog:
         tc_list = [x for x in test_db.test_case_names if self.__matches_filter(x)]
 
         self.tc_list_sorted = self.__sort_tc_list(tc_list)
+        # Sort keys are kept for determining the position of updated entries via bisect.
+        # Keys of an entry only change upon a stats update notification for that entry.
+        sort_key_fn = self.__get_sort_key_fn()
+        self.sort_keys = [sort_key_fn(x) for x in self.tc_list_sorted]
         self.__populate_table()
 
 
@@ -391,18 +399,14 @@ class TcListDialog:
         return tc_list
 
 
-    def __check_sort_order(self, tc_name, line_idx):
+    def __check_sort_order(self, sort_key, line_idx):
         if self.opt_sort_modes:
             if line_idx > 0:
-                prev_name = self.tc_list_sorted[line_idx - 1]
-                if (TcListDialog.__get_sort_keys(self.opt_sort_modes, tc_name)
-                        < TcListDialog.__get_sort_keys(self.opt_sort_modes, prev_name)):
+                if sort_key < self.sort_keys[line_idx - 1]:
                     return False
 
-            if line_idx + 1 < len(self.tc_list_sorted):
-                next_name = self.tc_list_sorted[line_idx + 1]
-                if (TcListDialog.__get_sort_keys(self.opt_sort_modes, next_name)
-                        < TcListDialog.__get_sort_keys(self.opt_sort_modes, tc_name)):
+            if line_idx + 1 < len(self.sort_keys):
+                if self.sort_keys[line_idx + 1] < sort_key:
                     return False
 
         return True
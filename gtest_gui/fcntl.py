@@ -6,6 +6,9 @@ import os
 import subprocess
 import sys
 
+# Requested capacity of pipes for reading test output
+PIPE_BUF_SIZE = 1024*1024
+
 if sys.platform == "win32":
     # Posted to stackoverflow.com by anatoly techtonik, Dec/29/2015
 
@@ -45,6 +48,13 @@ if sys.platform == "win32":
             raise OSError(GetLastError(), WinError())
 
 
+    def set_pipe_size(pipe):  # pylint: disable=unused-argument
+        """
+        Configure the capacity of the given pipe. On this platform the capacity
+        is determined upon pipe creation, so this function does nothing.
+        """
+
+
     def read_nonblocking(pipe, length):
         """
         Read from a non-blocking pipe. If there is no data return None. Any
@@ -78,6 +88,19 @@ else:
         fcntl.fcntl(pipe, fcntl.F_SETFL, flags | os.O_NONBLOCK)
 
 
+    def set_pipe_size(pipe):
+        """
+        Enlarge the capacity of the given pipe, so that the writer is not blocked
+        while the reader is delayed between reading, on platforms that support
+        this (i.e. Linux). Failure is ignored, as the capacity is only a hint.
+        """
+        if hasattr(fcntl, "F_SETPIPE_SZ"):
+            try:
+                fcntl.fcntl(pipe, fcntl.F_SETPIPE_SZ, PIPE_BUF_SIZE)
+            except OSError:
+                pass
+
+
     def read_nonblocking(pipe, length):
         """
         Read from a non-blocking pipe. Returns an empty string if there is no data.
@@ -21,6 +21,9 @@
 Implements Interface classes to GTest command line and trace output.
 """
 
+import concurrent.futures
+import itertools
+import mmap
 import os
 import queue
 import re
@@ -40,6 +43,23 @@ import gtest_gui.trace_db as trace_db
 import gtest_gui.fcntl
 
 
+# Patterns for parsing GTest output: result lines in output received via pipe and
+# in trace files (both preceded by newline), and failure locations. Searching for
+# the newline as literal prefix is much faster than using "^" in multi-line mode.
+RE_PIPE_RESULT_LINE = re.compile(
+    rb"\n\[( +RUN +| +OK +| +FAILED +| +SKIPPED +|----------|==========)\] +"
+    rb"(\S+)(?:\s+\((\d+)\s*ms\))?[^\n\r]*(?=[\r\n])")
+
+FILE_RESULT_LINE = (rb"\[( +RUN +| +OK +| +FAILED +| +SKIPPED +| +CRASHED +|----------|"
+                    rb"==========)\] +(\S+)(?:\s+\((\d+)\s*ms\))?")
+RE_FILE_RESULT_LINE = re.compile(rb"\n" + FILE_RESULT_LINE)
+RE_FILE_RESULT_FIRST_LINE = re.compile(FILE_RESULT_LINE)
+
+RE_FAILURE_LOCATION = re.compile(rb"^(.*):([0-9]+): Failure", re.MULTILINE)
+
+# Verdict values for test case result line types, indexed by stripped line type
+RESULT_LINE_VERDICTS = {b"OK": 0, b"SKIPPED": 1, b"FAILED": 2, b"CRASHED": 3}
+
 gtest_ctrl = None
 
 def initialize():
@@ -96,7 +116,10 @@ class GtestControl:
                     return
                 exe_name = test_db.test_exe_name
 
-        sharding = GtestSharding(len(tc_list), rep_cnt, job_cnt, job_runall_cnt)
+        # Durations from the previous campaign are used for balancing shards
+        sharding = GtestSharding(len(tc_list), rep_cnt, job_cnt, job_runall_cnt,
+                                 test_db.get_tc_durations(tc_list))
+        base_env = _get_job_base_env()
 
         trace_idx = trace_db.first_free_trace_file_idx(self.__exe_ts)
         for idx in range(job_cnt):
@@ -114,7 +137,7 @@ class GtestControl:
                                             break_on_fail, break_on_except,
                                             job_rep_cnt, job_cpu_cnt, job_cpu_idx, shard_tc_cnt,
                                             idx >= job_cnt - job_runall_cnt,
-                                            self.__result_queue))
+                                            base_env, self.__result_queue))
             except OSError as exc:
                 tk_messagebox.showerror(parent=tk_utils.tk_top,
                                         message="Failed to start jobs: " + str(exc))
@@ -189,19 +212,25 @@ class GtestControl:
 
 
     def __poll_queue(self):
+        # Results are added to the database in batches, for reducing display updates
+        results = []
         try:
             while True:
                 result = self.__result_queue.get(block=False)
                 if result[0]:
                     log = result[0]
-                    if log[3] >= 2:
+                    if log.verdict >= 2:
                         self.__report_fail()
-                    test_db.add_result(result[0], result[1])
+                    results.append(result)
                 else:
+                    test_db.add_results(results)
+                    results = []
                     self.__report_exit(result[1])
         except queue.Empty:
             pass
 
+        test_db.add_results(results)
+
         if self.__jobs:
             tk_utils.tk_top.after(250, self.__poll_queue)
 
@@ -315,7 +344,7 @@ class GtestJob:
                  filter_str, run_disabled, shuffle, valgrind_cmd,
                  clean_trace, clean_core, break_on_fail, break_on_except,
                  rep_cnt, shard_cnt, shard_idx, expexted_result_cnt,
-                 is_bg_job, result_queue):
+                 is_bg_job, base_env, result_queue):
         """
         Spawns a new test process from the given test executable file with the
         given GTest parameters.
@@ -329,7 +358,11 @@ class GtestJob:
         self.__is_bg_job = is_bg_job
         self.__valgrind_exit = 0
         self.__result_queue = result_queue
-        self.__buf_data = b""
+        # Using bytearray for appending and removing data in place; note snippets
+        # sliced from the buffer thereby are bytearrays too, so they are extended in place.
+        # The first byte is the already processed end of the preceding line, which
+        # allows matching result lines by their leading newline.
+        self.__buf_data = bytearray(b"\n")
         self.__snippet_name = b""
         self.__snippet_data = b""
         self.__trailer = False
@@ -340,6 +373,7 @@ class GtestJob:
         self.__result_cnt = 0
         self.__terminated = False
         self.__io_error = None
+        self.__pending_results = []
         self.log = ""
 
         cmd = []
@@ -363,19 +397,7 @@ class GtestJob:
         if break_on_except:
             cmd.append("--gtest_catch_exceptions=0")
 
-        env = os.environ.copy()
-        env.pop("GTEST_FILTER", None)
-        env.pop("GTEST_FAIL_FAST", None)
-        env.pop("GTEST_ALSO_RUN_DISABLED_TESTS", None)
-        env.pop("GTEST_BREAK_ON_FAILURE", None)
-        env.pop("GTEST_CATCH_EXCEPTIONS", None)
-        env.pop("GTEST_REPEAT", None)
-        env.pop("GTEST_SHUFFLE", None)
-        env.pop("GTEST_PRINT_TIME", None)
-        env.pop("GTEST_OUTPUT", None)
-        #env.pop("GTEST_RANDOM_SEED", None)
-        #env.pop("GTEST_COLOR", None)
-        #env.pop("GTEST_PRINT_UTF8", None)
+        env = base_env.copy()
 
         # Have GTest create dummy file for detecting "premature exit"
         env["TEST_PREMATURE_EXIT_FILE"] = out_file_name + ".running"
@@ -383,9 +405,6 @@ class GtestJob:
         if shard_cnt > 1:
             env["GTEST_TOTAL_SHARDS"] = str(shard_cnt)
             env["GTEST_SHARD_INDEX"] = str(shard_idx)
-        else:
-            env.pop("GTEST_TOTAL_SHARDS", None)
-            env.pop("GTEST_SHARD_INDEX", None)
 
         # exceptions to be caught by caller
         self.__proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
@@ -394,8 +413,10 @@ class GtestJob:
         # Configure output pipe as non-blocking:
         # Caller is responsible for periodically calling communicate() to collect trace output
         gtest_gui.fcntl.set_nonblocking(self.__proc.stdout)
+        gtest_gui.fcntl.set_pipe_size(self.__proc.stdout)
 
-        self.__out_file = open(out_file_name, "wb", buffering=0)
+        # Writes are buffered and flushed once per chunk of received output
+        self.__out_file = open(out_file_name, "wb")
 
 
     def terminate(self, kill=False):
@@ -488,7 +509,8 @@ class GtestJob:
 
         try:
             # read input from the pipe to the test process
-            data = gtest_gui.fcntl.read_nonblocking(self.__proc.stdout, 256*1024)
+            data = gtest_gui.fcntl.read_nonblocking(self.__proc.stdout,
+                                                    gtest_gui.fcntl.PIPE_BUF_SIZE)
         except OSError as exc:
             self.__io_error = "Error reading pipe from test process: " + str(exc)
             self.__proc.terminate()
@@ -550,7 +572,7 @@ class GtestJob:
 
             if core_file or aborted:
                 if self.__snippet_data:
-                    self.__snippet_data += self.__buf_data
+                    self.__snippet_data += self.__buf_data[1:]
                     self.__snippet_data += (b"\n[  CRASHED ] " + self.__snippet_name +
                                             b"\n[----------] Exit code: %d\n" % retval)
                     self.__process_trace(self.__snippet_name, 3, 0, core_file)
@@ -561,7 +583,7 @@ class GtestJob:
                 # this is a special case as we don't know which test case caused the error
                 self.__process_trace(b"", 4, 0, None)
             elif not self.__failed_cnt:
-                self.__snippet_data += self.__buf_data
+                self.__snippet_data += self.__buf_data[1:]
                 self.__snippet_data += (b"\n[----------] Exit code: %d\n" % retval)
                 self.__process_trace(b"", 5, 0, None)
 
@@ -570,9 +592,10 @@ class GtestJob:
             self.__process_trace(b"", 5, 0, None)
 
         else:
-            self.__trace_to_file(self.__buf_data)
+            self.__trace_to_file(self.__buf_data[1:])
 
         self.__close_trace_file()
+        self.__report_results()
 
         # report exit to parent
         self.__result_queue.put((None, self))
@@ -581,46 +604,53 @@ class GtestJob:
     def __process_pipe(self, data):
         self.__sum_input_trace += len(data)
         self.__buf_data += data
-        done_off = 0
-        for match in re.finditer(
-                rb"^\[( +RUN +| +OK +| +FAILED +| +SKIPPED +|----------|==========)\] +"
-                rb"(\S+)(?:\s+\((\d+)\s*ms\))?[^\n\r]*[\r\n]",
-                self.__buf_data, re.MULTILINE):
-
-            if b"RUN" in match.group(1):
-                self.__trace_to_file(self.__snippet_data)
-                self.__trace_to_file(self.__buf_data[done_off : match.start()])
-                self.__snippet_name = match.group(2)
-                self.__snippet_data = self.__buf_data[match.start() : match.end()]
-                self.__trailer = False
-
-            elif b" " in match.group(1) and not self.__trailer:
-                if b"OK" in match.group(1):
-                    is_failed = 0
-                elif b"SKIPPED" in match.group(1):
-                    is_failed = 1
-                else:
-                    is_failed = 2
-                self.__snippet_data += self.__buf_data[done_off : match.end()]
-                self.__process_trace(match.group(2), is_failed, match.group(3), None)
-                self.__snippet_data = b""
-                self.__snippet_name = b""
+        done_off = 1
+        # Data is copied from the buffer via a view, so that only the consumer makes a copy;
+        # the view has to be released before the buffer can be resized
+        with memoryview(self.__buf_data) as buf_view:
+            for match in RE_PIPE_RESULT_LINE.finditer(self.__buf_data):
+                # line starts after the matched newline and includes one end-of-line character
+                line_off = match.start() + 1
+                line_end = match.end() + 1
+                line_type = match.group(1).strip()
+                verdict = RESULT_LINE_VERDICTS.get(line_type)
+
+                if line_type == b"RUN":
+                    self.__trace_to_file(self.__snippet_data)
+                    self.__trace_to_file(buf_view[done_off : line_off])
+                    self.__snippet_name = match.group(2)
+                    self.__snippet_data = self.__buf_data[line_off : line_end]
+                    self.__trailer = False
+
+                elif (verdict is not None) and not self.__trailer:
+                    is_failed = verdict
+                    self.__snippet_data += buf_view[done_off : line_end]
+                    self.__process_trace(match.group(2), is_failed, match.group(3), None)
+                    self.__snippet_data = b""
+                    self.__snippet_name = b""
 
+                else:
+                    self.__trace_to_file(self.__snippet_data)
+                    self.__trace_to_file(buf_view[done_off : line_end])
+                    self.__snippet_data = b""
+                    self.__snippet_name = b""
+                    self.__trailer = True
+
+                done_off = line_end
+
+            # The remainder of the previous call holds no line end, so searching is limited
+            # to new data; this avoids repeated scanning of very long lines
+            last_line_off = _find_last_line_start(self.__buf_data, done_off,
+                                                  len(self.__buf_data) - len(data))
+            if self.__snippet_data:
+                self.__snippet_data += buf_view[done_off : last_line_off]
             else:
-                self.__trace_to_file(self.__snippet_data)
-                self.__trace_to_file(self.__buf_data[done_off : match.end()])
-                self.__snippet_data = b""
-                self.__snippet_name = b""
-                self.__trailer = True
+                self.__trace_to_file(buf_view[done_off : last_line_off])
 
-            done_off = match.end()
+        del self.__buf_data[:last_line_off - 1]
 
-        last_line_off = _find_last_line_start(self.__buf_data, done_off)
-        if self.__snippet_data:
-            self.__snippet_data += self.__buf_data[done_off : last_line_off]
-        else:
-            self.__trace_to_file(self.__buf_data[done_off : last_line_off])
-        self.__buf_data = self.__buf_data[last_line_off:]
+        self.__flush_trace_file()
+        self.__report_results()
 
 
     def __process_trace(self, tc_name, is_failed, duration, core_file):
@@ -629,7 +659,7 @@ class GtestJob:
         fail_file = ""
         fail_line = 0
         if is_failed >= 2:
-            match = re.search(b"^(.*):([0-9]+): Failure", self.__snippet_data, re.MULTILINE)
+            match = RE_FAILURE_LOCATION.search(self.__snippet_data)
             if match:
                 fail_file = os.path.basename(match.group(1).decode(errors="backslashreplace"))
                 fail_line = int(match.group(2))
@@ -639,7 +669,7 @@ class GtestJob:
         pat = config_db.get_opt("seed_regexp")
         if pat:
             try:
-                match = re.search(pat.encode(), self.__snippet_data, re.MULTILINE)
+                match = config_db.get_seed_regexp(pat).search(self.__snippet_data)
                 if match:
                     seed = match.group(1).decode(errors="backslashreplace")
             except (re.error, IndexError):
@@ -656,12 +686,13 @@ class GtestJob:
             trace_start_off = 0
             trace_length = self.__out_file.tell()
 
-        self.__result_queue.put(((tc_name, self.__exe_name, self.__exe_ts, is_failed,
-                                  self.__out_file_name if store_trace else None,
-                                  trace_start_off, trace_length, core_file,
-                                  fail_file, fail_line, duration, int(time.time()),
-                                  self.__is_valgrind, False, seed),
-                                 self.__is_bg_job))
+        self.__pending_results.append((test_db.TestResult(
+                                           tc_name, self.__exe_name, self.__exe_ts, is_failed,
+                                           self.__out_file_name if store_trace else None,
+                                           trace_start_off, trace_length, core_file,
+                                           fail_file, fail_line, duration, int(time.time()),
+                                           self.__is_valgrind, 0, seed),
+                                       self.__is_bg_job))
         self.__result_cnt += 1
 
 
@@ -672,6 +703,20 @@ class GtestJob:
             self.__io_error = "Error writing trace output to file: " + str(exc)
 
 
+    def __flush_trace_file(self):
+        try:
+            self.__out_file.flush()
+        except OSError as exc:
+            self.__io_error = "Error writing trace output to file: " + str(exc)
+
+
+    def __report_results(self):
+        # Results are reported only after their trace was written to the file
+        for result in self.__pending_results:
+            self.__result_queue.put(result)
+        self.__pending_results = []
+
+
     def __close_trace_file(self):
         try:
             self.__out_file.close()
@@ -686,32 +731,42 @@ class GtestJob:
 
 # ----------------------------------------------------------------------------
 
-def _find_last_line_start(buf, off):
-    nl_char = b"\n"[0]
-    for idx in reversed(range(off, len(buf))):
-        if buf[idx] == nl_char:
-            return idx + 1
-    return off
-
-
-def _find_prev_line_end(buf, off):
-    nl_char = b"\n"[0]
-    for idx in reversed(range(off, len(buf))):
-        if buf[idx] == nl_char:
-            return idx
-    return off
+def _get_job_base_env():
+    """
+    Returns a copy of the environment with variables removed that would override
+    GTest command line options passed to test processes. Per-job variables are
+    added by each job on a copy of the result.
+    """
+    env = os.environ.copy()
+    env.pop("GTEST_FILTER", None)
+    env.pop("GTEST_FAIL_FAST", None)
+    env.pop("GTEST_ALSO_RUN_DISABLED_TESTS", None)
+    env.pop("GTEST_BREAK_ON_FAILURE", None)
+    env.pop("GTEST_CATCH_EXCEPTIONS", None)
+    env.pop("GTEST_REPEAT", None)
+    env.pop("GTEST_SHUFFLE", None)
+    env.pop("GTEST_PRINT_TIME", None)
+    env.pop("GTEST_OUTPUT", None)
+    env.pop("GTEST_TOTAL_SHARDS", None)
+    env.pop("GTEST_SHARD_INDEX", None)
+    #env.pop("GTEST_RANDOM_SEED", None)
+    #env.pop("GTEST_COLOR", None)
+    #env.pop("GTEST_PRINT_UTF8", None)
+    return env
+
+
+def _find_last_line_start(buf, off, search_off=0):
+    idx = buf.rfind(b"\n", max(off, search_off))
+    return idx + 1 if idx >= 0 else off
 
 
 def _find_next_line_end(buf, off):
-    nl_char = b"\n"[0]
-    for idx in range(off, len(buf)):
-        if buf[idx] == nl_char:
-            return idx + 1
-    return off
+    idx = buf.find(b"\n", off)
+    return idx + 1 if idx >= 0 else off
 
 
-def _gtest_import_tc_result(tc_name, is_failed, duration, snippet, start_off,
-                            file_name, file_ts, import_flag):
+def _gtest_parse_tc_result(tc_name, is_failed, duration, snippet, start_off,
+                           file_name, file_ts, import_flag):
     tc_name = tc_name.decode(errors="backslashreplace")
 
     if not duration:
@@ -734,7 +789,7 @@ def _gtest_import_tc_result(tc_name, is_failed, duration, snippet, start_off,
     fail_file = ""
     fail_line = 0
     if is_failed:
-        match = re.search(b"^(.*):([0-9]+): Failure", snippet, re.MULTILINE)
+        match = RE_FAILURE_LOCATION.search(snippet)
         if match:
             fail_file = os.path.basename(match.group(1).decode(errors="backslashreplace"))
             fail_line = int(match.group(2))
@@ -743,79 +798,104 @@ def _gtest_import_tc_result(tc_name, is_failed, duration, snippet, start_off,
     pat = config_db.get_opt("seed_regexp")
     if pat:
         try:
-            match = re.search(pat.encode(), snippet, re.MULTILINE)
+            match = config_db.get_seed_regexp(pat).search(snippet)
             if match:
                 seed = match.group(1).decode(errors="backslashreplace")
         except (re.error, IndexError):
             pass
 
-    test_db.import_result((tc_name, None, 0, is_failed, file_name, start_off, len(snippet),
-                           core_path, fail_file, fail_line, duration, file_ts, False,
-                           import_flag, seed))
+    return test_db.TestResult(tc_name, None, 0, is_failed, file_name,
+                              start_off, len(snippet), core_path,
+                              fail_file, fail_line, duration, file_ts, False,
+                              import_flag, seed)
+
+
+def gtest_import_result_files(file_names, is_auto):
+    """
+    Import test results from the given list of files previously written by
+    GTest. Files are parsed concurrently in worker threads, while results are
+    imported in the caller's thread in order of the given list. This function
+    may throw OSError, which then has the name of the failing file assigned.
+    """
+    if not file_names:
+        return
+
+    max_workers = min(len(file_names), os.cpu_count() or 1)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_gtest_parse_result_file, file_name, is_auto)
+                   for file_name in file_names]
+        for file_name, future in zip(file_names, futures):
+            try:
+                results = future.result()
+            except OSError as exc:
+                # errors raised while mapping or reading the file do not include its name
+                exc.filename = file_name
+                raise
+            for log in results:
+                test_db.import_result(log)
 
 
-def gtest_import_result_file(file_name, is_auto):
-    """ Import test results from the given file previously written by GTest. """
+def _gtest_parse_result_file(file_name, is_auto):
+    """
+    Parse the given file previously written by GTest and return a list of test
+    results. This function does not modify the test database, so that it can
+    be executed in worker threads.
+    """
     import_flag = 1 if is_auto else 2
-    file_ts = int(os.stat(file_name).st_mtime)  # cast away sub-second fraction
+    results = []
     with open(file_name, "rb", buffering=0) as file_obj:
-        snippet_start = 0
-        snippet_name = b""
-        snippet_data = b""
-        is_trailer = False
-        # Initializing with newline to allow preceding match with "\n", as "^" is extremely slow
-        buf_data = b"\n"
-        file_off = -1
+        # Querying via the open file avoids a second path lookup
+        file_stat = os.fstat(file_obj.fileno())
+        file_ts = int(file_stat.st_mtime)  # cast away sub-second fraction
+        if file_stat.st_size == 0:
+            return results
+
+        # File is mapped into memory, so that it can be parsed in a single pass
+        with mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) as file_data:
+            snippet_start = 0
+            snippet_name = b""
+            snippet_off = None
+            is_trailer = False
+            done_off = 0
 
-        while True:
-            new_data = file_obj.read(256*1024)
-            if not new_data:
-                break
+            # Lines are matched with preceding "\n", as "^" is extremely slow; hence the first
+            # line is matched separately; line start is derived from the group following "["
+            matches = RE_FILE_RESULT_LINE.finditer(file_data)
+            first_match = RE_FILE_RESULT_FIRST_LINE.match(file_data)
+            if first_match:
+                matches = itertools.chain((first_match,), matches)
 
-            buf_data += new_data
-            done_off = 0
-            for match in re.finditer(
-                    rb"\n\[( +RUN +| +OK +| +FAILED +| +SKIPPED +| +CRASHED +|----------|"
-                    rb"==========)\] +(\S+)(?:\s+\((\d+)\s*ms\))?",
-                    buf_data):
+            for match in matches:
+                line_type = match.group(1).strip()
+                verdict = RESULT_LINE_VERDICTS.get(line_type)
 
-                if b"RUN" in match.group(1):
+                if line_type == b"RUN":
                     snippet_name = match.group(2)
-                    snippet_data = buf_data[match.start() + 1 : match.end()]
-                    snippet_start = file_off + match.start() + 1
+                    snippet_start = match.start(1) - 1
+                    snippet_off = snippet_start
                     is_trailer = False
 
-                elif b" " in match.group(1) and not is_trailer:
-                    if b"OK" in match.group(1):
-                        is_failed = 0
-                    elif b"SKIPPED" in match.group(1):
-                        is_failed = 1
-                    elif b"FAILED" in match.group(1):
-                        is_failed = 2
-                    else:
-                        is_failed = 3
-
-                    end_off = _find_next_line_end(buf_data, match.end())
-                    snippet_data += buf_data[done_off : end_off]
+                elif (verdict is not None) and not is_trailer:
+                    is_failed = verdict
+                    end_off = _find_next_line_end(file_data, match.end())
+                    snippet_data = file_data[(done_off if snippet_off is None else snippet_off)
+                                             : end_off]
 
-                    _gtest_import_tc_result(snippet_name, is_failed, match.group(3),
-                                            snippet_data, snippet_start,
-                                            file_name, file_ts, import_flag)
+                    results.append(_gtest_parse_tc_result(snippet_name, is_failed,
+                                                          match.group(3), snippet_data,
+                                                          snippet_start, file_name,
+                                                          file_ts, import_flag))
                     snippet_name = b""
-                    snippet_data = b""
+                    snippet_off = None
 
                 else:
                     snippet_name = b""
-                    snippet_data = b""
+                    snippet_off = None
                     is_trailer = True
 
                 done_off = match.end()
 
-            last_line_off = _find_prev_line_end(buf_data, done_off)
-            if snippet_data:
-                snippet_data += buf_data[done_off : last_line_off]
-            buf_data = buf_data[last_line_off:]
-            file_off += last_line_off
+    return results
 
 
 def gtest_automatic_import():
@@ -824,8 +904,7 @@ def gtest_automatic_import():
     configured trace directory.
     """
     try:
-        for file_name in trace_db.search_trace_sub_dirs():
-            gtest_import_result_file(file_name, True)
+        gtest_import_result_files(trace_db.search_trace_sub_dirs(), True)
     except OSError as exc:
         tk_messagebox.showerror(parent=tk_utils.tk_top,
                                 message="Error during automatic import of trace files: " + str(exc))
@@ -21,6 +21,9 @@
 Implements class GtestSharding
 """
 
+import functools
+import heapq
+
 class GtestSharding:
     """
     This class is used for determining an efficient way to schedule test case
@@ -34,19 +37,31 @@ class GtestSharding:
     to partition the set of test cases by repetitions and GTest sharding so
     that execution time is minimized. For the example of a single test case
     to be repeated many times, it would only partition by repetitions and not
-    use sharding at all.
+    use sharding at all. When execution durations of the test cases are known
+    from previous runs, these are used in place of the test case count for
+    estimating execution time of each shard.
 
     The class is an iterator. In each iteration it returns parameters for the
     next test job.
     """
 
-    def __init__(self, tc_cnt, rep_cnt, job_cnt, run_all_cnt=0):
-        """ Creates an instance of the sharding parameter iterator object. """
+    def __init__(self, tc_cnt, rep_cnt, job_cnt, run_all_cnt=0, tc_durations=None):
+        """
+        Creates an instance of the sharding parameter iterator object. Optional
+        parameter tc_durations is a list with the expected duration of each
+        test case in milliseconds, in order of execution.
+        """
         if tc_cnt and rep_cnt and job_cnt:
+            if tc_durations and len(tc_durations) == tc_cnt:
+                # Each test case is accounted with at least 1 ms to avoid zero cost estimates
+                tc_costs = [max(1, x) for x in tc_durations]
+            else:
+                tc_costs = None
+
             (self.__parts, self.__reps) = \
                 GtestSharding.__calc_repetitions(
-                    GtestSharding.__calc_partitions(tc_cnt, job_cnt - run_all_cnt, rep_cnt),
-                    tc_cnt, rep_cnt)
+                    GtestSharding.__calc_partitions(tc_cnt, job_cnt - run_all_cnt),
+                    tc_cnt, rep_cnt, tc_costs)
 
             if run_all_cnt:
                 self.__parts.extend([1] * run_all_cnt)
@@ -100,56 +115,71 @@ class GtestSharding:
 
 
     @staticmethod
-    def __calc_repetitions(partitions, tc_cnt, rep_cnt):
+    def __calc_max_shard_cost(tc_costs, shard_size):
+        # GTest assigns test cases to shards round-robin in order of the test case list
+        return max(sum(tc_costs[idx::shard_size]) for idx in range(shard_size))
+
+
+    @staticmethod
+    def __calc_repetitions(partitions, tc_cnt, rep_cnt, tc_costs):
         min_time = tc_cnt * rep_cnt
         min_parts = None
         min_reps = None
+        max_shard_costs = {}
         for part in partitions:
-            tcs = [int((tc_cnt + x - 1) / x) for x in part]
-
-            # step #1: estimate repetiton count based on TC# relation between CPU partitions
+            if tc_costs:
+                # Cost of a partition is determined by its slowest shard
+                for shard_size in part:
+                    if shard_size not in max_shard_costs:
+                        max_shard_costs[shard_size] = \
+                            GtestSharding.__calc_max_shard_cost(tc_costs, shard_size)
+                tcs = [max_shard_costs[x] for x in part]
+            else:
+                tcs = [(tc_cnt + x - 1) // x for x in part]
+
+            # step #1: estimate repetiton count based on the relation of shard costs (i.e.
+            # test case count or duration) between CPU partitions
             # (needed for reducing the number of iterations in step 2)
             tc_est = [tcs[0] / x for x in tcs]
             sum_est = sum(tc_est)
-            reps = [int(rep_cnt / sum_est * x) for x in tc_est]
-            tcs_rep = tcs.copy()
-            # pylint: disable=consider-using-enumerate
-            for rep_idx in range(len(tcs_rep)):
-                tcs_rep[rep_idx] *= reps[rep_idx]
-
-            # step #2: distribute remaining repetitions to partitions
-            for rep_idx in range(sum(reps), rep_cnt):
-                min_idx = 0
-                min_val = tcs_rep[0] + tcs[0]
-                for idx in range(1, len(tcs)):
-                    if tcs_rep[idx] + tcs[idx] < min_val:
-                        min_idx = idx
-                        min_val = tcs_rep[idx] + tcs[idx]
+            rep_fact = rep_cnt / sum_est
+            reps = [int(rep_fact * x) for x in tc_est]
+            tcs_rep = [tc * rep for (tc, rep) in zip(tcs, reps)]
+
+            # step #2: distribute remaining repetitions to partitions: each is assigned to the
+            # partition with minimum cost after adding it; heap is ordered by that value and index
+            next_heap = [(tcs_rep[idx] + tcs[idx], idx) for idx in range(len(tcs))]
+            heapq.heapify(next_heap)
+            for _ in range(sum(reps), rep_cnt):
+                (min_val, min_idx) = next_heap[0]
                 tcs_rep[min_idx] = min_val
                 reps[min_idx] += 1
+                heapq.heapreplace(next_heap, (min_val + tcs[min_idx], min_idx))
             new_max = max(tcs_rep)
             #print("DBG part: " + str(part) + " -> " + str(tcs) + " -> " + str(new_max))
 
-            # among all possible sharding partitions, select that with minimum TC# per CPU
+            # among all possible sharding partitions, select that with minimum cost per CPU
             if (new_max < min_time) or (min_parts is None):
                 min_time = new_max
                 min_reps = reps
-                min_parts = part.copy()
+                min_parts = list(part)
 
         #print(("Choice: %d " % min_time) + str(min_parts) + " * " + str(min_reps))
         return (min_parts, min_reps)
 
 
     @staticmethod
-    def __calc_partitions(tc_cnt, job_cnt, rep_cnt):
+    def __calc_partitions(tc_cnt, job_cnt):
         # Start recursion for enumeration of possible partitionings
-        partitions = GtestSharding.__calc_parts_sub([], job_cnt, tc_cnt, rep_cnt, job_cnt)
-        return partitions
+        return GtestSharding.__calc_parts_sub(job_cnt, tc_cnt, job_cnt)
 
 
     @staticmethod
-    def __calc_parts_sub(pre_part, cpu_cnt, tc_cnt, rep_cnt, max_cpu_cnt):
-        #print("DBG %s | %d,%d,%d,%d" % (str(pre_part), cpu_cnt, tc_cnt, rep_cnt, max_cpu_cnt))
+    @functools.lru_cache(maxsize=None)
+    def __calc_parts_sub(cpu_cnt, tc_cnt, max_cpu_cnt):
+        # Returns a tuple of possible partitionings of the given CPU count. Results are
+        # cached, as the same partitioning of remaining CPUs is reached via many prefixes.
+        #print("DBG %d,%d,%d" % (cpu_cnt, tc_cnt, max_cpu_cnt))
         partitions = []
         prev_cval = 0
         div = 1
@@ -159,18 +189,18 @@ class GtestSharding:
             if cval != prev_cval and cval <= max_cpu_cnt:
                 if cval > 1:
                     cnt = int(cpu_cnt / cval)
-                    part = pre_part + ([cval] * cnt)
+                    part = (cval,) * cnt
                     remainder = cpu_cnt - (cval * cnt)
 
                     if remainder > 0:
                         # Recurse to decide partitioning of remaining CPUs
-                        partitions.extend(GtestSharding.__calc_parts_sub(part, remainder,
-                                                                         tc_cnt, rep_cnt,
+                        partitions.extend(part + sub_part for sub_part in
+                                          GtestSharding.__calc_parts_sub(remainder, tc_cnt,
                                                                          min(remainder, cval)))
                     else:
                         partitions.append(part)
                 else:
-                    partitions.append(pre_part + [1] * cpu_cnt)
+                    partitions.append((1,) * cpu_cnt)
 
             prev_cval = cval
             if cval <= 1:
@@ -178,6 +208,6 @@ class GtestSharding:
             div += 1
 
         if not partitions:
-            partitions.append(pre_part + [cpu_cnt])
+            partitions.append((cpu_cnt,))
 
-        return partitions
+        return tuple(partitions)
@@ -114,7 +114,7 @@ HELP_TEXTS = [
 ''', 'indent'), ('''Test duration as reported by gtest (in milliseconds).
 ''', 'indent'), ('''In case of failure, source code file and line where of the first "Failure" was reported in trace output.
 ''', 'indent'), ('''Timestamp or name of executable that generated the test output, in case the executable has changed since running the test.
-''', 'indent'), ('''When selecting an entry by clicking on it, the corresponding trace output is shown in the trace preview frame below the result log. In case of a test case failure, the view is centered on the first line containing "Failure" and the text is marked by light red background.
+''', 'indent'), ('''When selecting an entry by clicking on it, the corresponding trace output is shown in the trace preview frame below the result log. In case of a test case failure, the view is centered on the first line containing "Failure" and all lines containing "Failure" are marked by light red background.
 ''', ''), ('''Double-clicking on an entry opens the trace of that entry in an external application, which can be selected via the Configuration dialog. Default application is "trace browser", a text browser with syntax highlighting and search and filtering capabilities especially tailored for trace analysis. As GTest writes trace output of all test cases into a single file, only the portion between "''', ''), ('''[ RUN ]''', 'fixed'), ('''" and "''', ''), ('''[ OK ]''', 'fixed'), ('''" or "''', ''), ('''[ FAILED ]''', 'fixed'), ('''" respectively of the selected test case is extracted and passed to the application.
 ''', ''), ('''When clicking on an entry with the right mouse button, a context menu opens that allow opening the trace file, adding or removing the selected test case from the filter option, scheduling a test for repetition, excluding a result from the log display, or removing results. The context menu also has an entry for sending the complete trace file to the external trace browser application; This may be needed in rare cases when behavior of a test case depends on the sequence of preceding tests.
 ''', ''), ('''Additional commands are offered in the "Result log" drop-down of the main window menu. The commands allow sorting and filtering the result log by various criteria. By default, log entries are sorted by the time they were created at. When running a test campaign, it's recommended to enabled the ''', ''), ('''Show only failed''', 'underlined'), (''' filter, so that it's easy to track which test cases failed.
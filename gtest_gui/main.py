@@ -119,13 +119,12 @@ def main():
         else:
             gtest_ctrl.gtest_automatic_import()
 
-    for file_name in trace_files:
-        try:
-            gtest_ctrl.gtest_import_result_file(file_name, False)
-        except OSError as exc:
-            msg = "Failed to import %s: %s" % (file_name, str(exc))
-            tk_messagebox.showerror(parent=tk_top, message=msg)
-            sys.exit(1)
+    try:
+        gtest_ctrl.gtest_import_result_files(trace_files, False)
+    except OSError as exc:
+        msg = "Failed to import %s: %s" % (exc.filename, str(exc))
+        tk_messagebox.showerror(parent=tk_top, message=msg)
+        sys.exit(1)
 
     # Construct the main window. This object is used only indirectly via Tk event handling.
     # pylint: disable=unused-variable
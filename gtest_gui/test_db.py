@@ -25,43 +25,55 @@ in this module, so that registered callbacks can be invoked for notifying
 various GUI modules about the change.
 """
 
+from collections import namedtuple
 from enum import IntEnum
 
 # Plain list of test case names, in order returned by test executable
 test_case_names = []
 
-# [ 0] test case name, or "" if valgrind error
-# [ 1] executable name, or None if imported
-# [ 2] executable timestamp, or 0 if imported
-# [ 3] verdict (0: pass, 1: skipped, 2: fail, 3: crash, 4: valgrind summary error, 5:error)
-# [ 4] trace file name (or None)
-# [ 5] trace file offset to start of line "[ RUN ]"
-# [ 6] trace length from start offset to end of line "[ OK|FAILED ]"
-# [ 7] core file name (or None)
-# [ 8] source code file of exception ("" if none)
-# [ 9] source code line of exception (0 if none)
-# [10] execution duration reported by gtest (milliseconds)
-# [11] execution end time (epoch timestamp)
-# [12] executed under valgrind (bool)
-# [13] imported from trace file: 0: not imported, 1: auto-import; 2: command line
-# [14] seed extracted from trace ("" if not configured or not found)
+# Type of elements in the result log list. Elements are accessed via the
+# attribute names listed below.
+# tc_name:     test case name, or "" if valgrind error
+# exe_name:    executable name, or None if imported
+# exe_ts:      executable timestamp, or 0 if imported
+# verdict:     verdict (0: pass, 1: skipped, 2: fail, 3: crash, 4: valgrind summary error, 5:error)
+# trace_file:  trace file name (or None)
+# trace_offs:  trace file offset to start of line "[ RUN ]"
+# trace_len:   trace length from start offset to end of line "[ OK|FAILED ]"
+# core_file:   core file name (or None)
+# fail_file:   source code file of exception ("" if none)
+# fail_line:   source code line of exception (0 if none)
+# duration:    execution duration reported by gtest (milliseconds)
+# end_ts:      execution end time (epoch timestamp)
+# is_valgrind: executed under valgrind (bool)
+# import_flag: imported from trace file: 0: not imported, 1: auto-import; 2: command line
+# seed:        seed extracted from trace ("" if not configured or not found)
+TestResult = namedtuple("TestResult", ("tc_name", "exe_name", "exe_ts", "verdict",
+                                       "trace_file", "trace_offs", "trace_len", "core_file",
+                                       "fail_file", "fail_line", "duration", "end_ts",
+                                       "is_valgrind", "import_flag", "seed"))
+
+# List of TestResult
 test_results = []
 
-# [0] pass count
-# [1] fail count
-# [2] skip count
-# [3] sum test durations
-# [4] executable timestamp
+# Number of results of passed tests from executables other than the current one
+old_pass_count = 0
+
+# tc_name:     pass count
+# exe_name:    fail count
+# exe_ts:      skip count
+# verdict:     sum test durations
+# trace_file:  executable timestamp
 test_case_stats = {}
 
-# [0] pass count
-# [1] fail count
-# [2] skip count
-# [3] running count
-# [4] expected count
-# [5] completed count, not including results from background jobs
-# [6] meta error count (i.e. valgrind)
-# [7] campaign start timestamp
+# tc_name:     pass count
+# exe_name:    fail count
+# exe_ts:      skip count
+# verdict:     running count
+# trace_file:  expected count
+# trace_offs:  completed count, not including results from background jobs
+# trace_len:   meta error count (i.e. valgrind)
+# core_file:   campaign start timestamp
 campaign_stats = [0, 0, 0, 0, 0, 0, 0, 0]
 
 # key: tc_name
@@ -102,6 +114,7 @@ def deregister_slot(slot_type):
 def update_executable(filename, exe_ts, tc_names):
     """ Update executable file path and timestamp and store its list of test case names. """
     global test_exe_name, test_exe_ts, test_case_names, test_case_stats, repeat_requests
+    global old_pass_count
 
     tc_names_update = (test_case_names != tc_names)
     tc_exe_update = (test_exe_name != filename)
@@ -110,6 +123,8 @@ def update_executable(filename, exe_ts, tc_names):
     test_exe_ts = exe_ts
     test_case_names = tc_names
 
+    old_pass_count = sum(1 for log in test_results if is_old_pass_result(log))
+
     for tc_name in tc_names:
         test_case_stats.setdefault(tc_name, [0, 0, 0, 0, 0])
 
@@ -125,55 +140,70 @@ def update_executable(filename, exe_ts, tc_names):
 
 def import_result(log):
     """ Append the given result log item without triggering callbacks. Used for bulk update. """
-    global test_results
+    global test_results, old_pass_count
     test_results.append(log)
+    if is_old_pass_result(log):
+        old_pass_count += 1
 
 
-def add_result(log, from_bg_job):
-    """ Append the given result log item and update campaign statistics accordingly. """
-    global test_results
-    tc_name = log[0]
-    verdict = log[3]
-
-    test_results.append(log)
-    if test_db_slots[SlotTypes.result_appended]:
-        test_db_slots[SlotTypes.result_appended]()
-
-    rep_req = repeat_requests.get(tc_name)
-    if rep_req is not None and rep_req < test_exe_ts:
-        repeat_requests.pop(tc_name)
-        if test_db_slots[SlotTypes.repeat_req_update]:
-            test_db_slots[SlotTypes.repeat_req_update](tc_name)
-
-    if verdict == 0: # pass
-        campaign_stats[0] += 1
-    elif verdict == 1: # skip
-        campaign_stats[2] += 1
-    elif verdict in (2, 3): # fail or crash
-        campaign_stats[1] += 1
-    else:
-        campaign_stats[6] += 1
-
-    if not from_bg_job and (verdict <= 3):
-        campaign_stats[5] += 1
-
-    if test_db_slots[SlotTypes.campaign_stats_update]:
+def add_results(results):
+    """
+    Append the given result log items and update campaign statistics accordingly.
+    Parameter is a list of tuples of a result log item and a flag indicating if
+    the result stems from a background job. Notifications about statistics
+    updates are sent only once per batch, and once per test case respectively.
+    """
+    global test_results, old_pass_count
+    updated_tc_names = {}
+
+    for (log, from_bg_job) in results:
+        tc_name = log.tc_name
+        verdict = log.verdict
+
+        test_results.append(log)
+        if is_old_pass_result(log):
+            old_pass_count += 1
+        if test_db_slots[SlotTypes.result_appended]:
+            test_db_slots[SlotTypes.result_appended]()
+
+        rep_req = repeat_requests.get(tc_name)
+        if rep_req is not None and rep_req < test_exe_ts:
+            repeat_requests.pop(tc_name)
+            if test_db_slots[SlotTypes.repeat_req_update]:
+                test_db_slots[SlotTypes.repeat_req_update](tc_name)
+
+        if verdict == 0: # pass
+            campaign_stats[0] += 1
+        elif verdict == 1: # skip
+            campaign_stats[2] += 1
+        elif verdict in (2, 3): # fail or crash
+            campaign_stats[1] += 1
+        else:
+            campaign_stats[6] += 1
+
+        if not from_bg_job and (verdict <= 3):
+            campaign_stats[5] += 1
+
+        stat = test_case_stats.get(tc_name)
+        if stat is None:
+            stat = [0, 0, 0, 0, 0]
+            test_case_stats[tc_name] = stat
+        if verdict == 1:
+            stat[2] += 1
+        elif verdict != 0:
+            stat[1] += 1
+        else:
+            stat[0] += 1
+        stat[3] += log.duration
+        stat[4] = log.exe_ts
+        updated_tc_names[tc_name] = True
+
+    if results and test_db_slots[SlotTypes.campaign_stats_update]:
         test_db_slots[SlotTypes.campaign_stats_update]()
 
-    stat = test_case_stats.get(tc_name)
-    if stat is None:
-        stat = [0, 0, 0, 0, 0]
-        test_case_stats[tc_name] = stat
-    if verdict == 1:
-        stat[2] += 1
-    elif verdict != 0:
-        stat[1] += 1
-    else:
-        stat[0] += 1
-    stat[3] += log[10]
-    stat[4] = log[2]
     if test_db_slots[SlotTypes.tc_stats_update]:
-        test_db_slots[SlotTypes.tc_stats_update](tc_name)
+        for tc_name in updated_tc_names:
+            test_db_slots[SlotTypes.tc_stats_update](tc_name)
 
 
 def delete_results(idx_list):
@@ -183,31 +213,52 @@ def delete_results(idx_list):
     however not updated by this.
     """
     # No callback is triggered by this change! Works as this originates from GUI only.
-    global test_results
+    global test_results, old_pass_count
 
     if len(idx_list) > 1:
-        idx_list = sorted(idx_list)
         # Copy items to a new list, except for those at selected indices. As the result list
         # can be rather large, this is significantly faster than deleting items in place.
-        new_list = []
-        rm_idx = 0
-        # pylint: disable=consider-using-enumerate
-        for idx in range(len(test_results)):
-            if idx == idx_list[rm_idx]:
-                if rm_idx + 1 < len(idx_list):
-                    rm_idx += 1
-            else:
-                new_list.append(test_results[idx])
-
-        test_results = new_list
+        rm_idx_set = set(idx_list)
+        old_pass_count -= sum(1 for idx in rm_idx_set if is_old_pass_result(test_results[idx]))
+        test_results = [log for idx, log in enumerate(test_results) if idx not in rm_idx_set]
 
     elif idx_list:
+        if is_old_pass_result(test_results[idx_list[0]]):
+            old_pass_count -= 1
         del test_results[idx_list[0]]
 
     else:
         pass
 
 
+def is_old_pass_result(log):
+    """
+    Queries if the given result log item is from a passed test of an
+    executable other than the current one, or an older version of it.
+    """
+    return (log.verdict == 0) and ((log.exe_name != test_exe_name) or (log.exe_ts < test_exe_ts))
+
+
+def get_tc_durations(tc_names):
+    """
+    Returns a list with the mean execution duration of each of the given test
+    cases according to current statistics, or None if no duration is known.
+    Test cases without results are assigned the mean of all known durations.
+    """
+    durations = []
+    for tc_name in tc_names:
+        stat = test_case_stats.get(tc_name)
+        cnt = (stat[0] + stat[1] + stat[2]) if stat else 0
+        durations.append(stat[3] / cnt if cnt else None)
+
+    known = [x for x in durations if x is not None]
+    if not known:
+        return None
+
+    mean = sum(known) / len(known)
+    return [mean if x is None else x for x in durations]
+
+
 def reset_run_stats(exp_result_cnt, is_resume):
     """ Reset campaign statistics upon start of a test campaign. """
     global campaign_stats, test_case_stats
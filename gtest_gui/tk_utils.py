@@ -30,6 +30,7 @@ font_bold = None
 font_content = None
 font_content_bold = None
 font_trace = None
+font_normal_char_w = 0
 wid_ctx_men = None
 
 xselection_wid = None
@@ -274,10 +275,11 @@ def update_derived_fonts():
     directly to the respective font objects. This function needs to be called
     afterward for additionally updating derived fonts, namely the bold variants.
     """
-    global font_normal, font_bold, font_content, font_content_bold
+    global font_normal, font_bold, font_content, font_content_bold, font_normal_char_w
     opt = font_normal.configure()
     opt["weight"] = tkf.BOLD
     font_bold.configure(**opt)
+    font_normal_char_w = font_normal.measure("0")
 
     opt = font_content.configure()
     opt["weight"] = tkf.BOLD
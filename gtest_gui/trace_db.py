@@ -26,7 +26,6 @@ output.
 """
 
 import os
-import re
 import sys
 
 from tkinter import messagebox as tk_messagebox
@@ -44,12 +43,9 @@ def first_free_trace_file_idx(exe_ts):
     """
     free_idx = 0
     for entry in os.scandir(get_trace_dir(exe_ts)):
-        if entry.is_file():
-            match = re.match(r"^trace\.(\d+)$", entry.name)
-            if match:
-                this_idx = int(match.group(1))
-                if this_idx >= free_idx:
-                    free_idx = this_idx + 1
+        this_idx = _get_trace_name_idx(entry.name)
+        if (this_idx is not None) and (this_idx >= free_idx) and entry.is_file():
+            free_idx = this_idx + 1
     return free_idx
 
 
@@ -74,15 +70,26 @@ def search_trace_sub_dirs():
 
     trace_files = []
     for base_entry in os.scandir(trace_dir_path):
-        if base_entry.is_dir() and re.match(r"^trace\.\d+$", base_entry.name):
+        if (_get_trace_name_idx(base_entry.name) is not None) and base_entry.is_dir():
             for entry in os.scandir(os.path.join(trace_dir_path, base_entry.name)):
-                if entry.is_file() and re.match(r"^trace\.(\d+)$", entry.name):
+                if (_get_trace_name_idx(entry.name) is not None) and entry.is_file():
                     trace_files.append(os.path.join(trace_dir_path,
                                                     base_entry.name, entry.name))
 
     return trace_files
 
 
+def _get_trace_name_idx(name):
+    """
+    Returns the numerical suffix of file or directory names of the form
+    "trace.N", or None for other names. This check is done via string
+    operations, as it is applied to all names in the trace directory.
+    """
+    if name.startswith("trace.") and name[6:].isdecimal():
+        return int(name[6:])
+    return None
+
+
 def get_trace_dir(exe_ts):
     """ Returns the path of the trace sub-directory for the given executable file. """
     trace_dir_path = "trace.%d" % exe_ts
@@ -203,20 +210,20 @@ def clean_all_trace_files(clean_failed=False):
     rm_exe = set()
     for log in test_db.test_results:
         # never auto-clean imported files: could interfere with other GUI instance
-        if log[4] and not log[13]:
-            rm_files.add(log[4])
+        if log.trace_file and not log.import_flag:
+            rm_files.add(log.trace_file)
             if not clean_failed:
-                if log[3] == 2 or log[3] == 3:
-                    contains_fail.add(log[4])
-                elif log[3] == 4: # valgrind: keep all pass traces
-                    del pass_parts[log[4]]
+                if log.verdict in (2, 3):
+                    contains_fail.add(log.trace_file)
+                elif log.verdict == 4: # valgrind: keep all pass traces
+                    del pass_parts[log.trace_file]
                 else:
-                    _add_passed_section(pass_parts, log[4], log[5], log[6])
+                    _add_passed_section(pass_parts, log.trace_file, log.trace_offs, log.trace_len)
 
-        if clean_failed and log[7]:
-            rm_files.add(log[7])
-            if log[1]:
-                rm_exe.add((log[1], log[2]))
+        if clean_failed and log.core_file:
+            rm_files.add(log.core_file)
+            if log.exe_name:
+                rm_exe.add((log.exe_name, log.exe_ts))
 
     if not clean_failed:
         for name in contains_fail:
@@ -266,7 +273,9 @@ def _compress_trace_file(name, parts):
 
 def extract_trace(file_name, file_offs, length):
     """
-    Reads the given portion of the given trace output file and returns it as a string.
+    Reads the given portion of the given trace output file and returns it as a
+    string. Only the requested range is read from the file, so that cost does
+    not depend on the size of the complete trace file.
     """
     try:
         with open(file_name, "rb") as file_obj:
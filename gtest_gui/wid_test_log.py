@@ -21,16 +21,21 @@
 This module implements the test result log class.
 """
 
+from collections import OrderedDict
 from datetime import datetime
 from enum import Enum
 import bisect
+import functools
+import math
+import operator
 import os
+import re
+import threading
 import time
 
 import tkinter as tk
 from tkinter import messagebox as tk_messagebox
 
-import gtest_gui.bisect
 import gtest_gui.config_db as config_db
 import gtest_gui.dlg_browser as dlg_browser
 import gtest_gui.gtest_ctrl as gtest_ctrl
@@ -41,6 +46,22 @@ from gtest_gui.wid_status_line import StatusLineWidget
 from gtest_gui.wid_text_sel import TextSelWidget
 
 
+# Pattern for lines highlighted in the trace preview
+RE_TRACE_FAILURE = re.compile(r": Failure")
+
+# Labels for test case verdicts in the result log, indexed by verdict value
+VERDICT_LABELS = (" Passed ", " Skipped ", " Failed ", " Crashed ")
+
+# Maximum number of line ranges removed individually when narrowing the result log filter
+REFILTER_MAX_RANGES = 100
+
+# Interval in milliseconds for polling completion of reading a trace for preview
+TRACE_READ_POLL_DELAY = 50
+
+# Maximum number of formatted lines kept for reuse when refilling the result log
+FMT_CACHE_SIZE = 100000
+
+
 class SortMode(Enum):
     """ Internal enumeration for sort options selectable by the user. """
     by_name = 0
@@ -70,9 +91,20 @@ class TestLogWidget:
         self.test_ctrl = None # set later
         self.test_ctrl_visible = True
         self.opt_sort_modes = []
+        self.sort_key_fn = None
         self.opt_filter_exe_ts = 0
         self.opt_filter_tc_names = None
         self.log_idx_map = []
+        self.sort_keys = []
+        self.mapped_sel = None
+        self.tc_name_lines = None
+        self.tid_trace_preview = None
+        self.tid_trace_read = None
+        self.tid_trace_insert = None
+        self.trace_cache = OrderedDict()
+        self.trace_preview_key = None
+        self.fmt_cache = OrderedDict()
+        self.fmt_cache_exe = None
 
         self.var_opt_sort_tc_name = tk.BooleanVar(self.tk_top, False)
         self.var_opt_sort_seed = tk.BooleanVar(self.tk_top, False)
@@ -83,6 +115,10 @@ class TestLogWidget:
         self.var_opt_filter_exe_name = tk.BooleanVar(self.tk_top, False)
         self.var_opt_filter_exe_ts = tk.BooleanVar(self.tk_top, False)
         self.var_opt_filter_tc_name = tk.BooleanVar(self.tk_top, False)
+        self.filter_match_fn = None
+        for var in (self.var_opt_filter_pass, self.var_opt_filter_exe_name,
+                    self.var_opt_filter_exe_ts, self.var_opt_filter_tc_name):
+            var.trace_add("write", self.__invalidate_filter_match_fn)
 
         self.wid_pane = tk.PanedWindow(parent, orient=tk.VERTICAL)
         self.__create_log_widget(self.wid_pane)
@@ -248,7 +284,20 @@ class TestLogWidget:
         return len(self.log_idx_map)
 
 
-    def __handle_selection_change(self, sel):
+    def __handle_selection_change(self, _sel):
+        self.mapped_sel = None
+
+        # Trace preview is delayed until the selection settles, so that
+        # intermediate selections while navigating via keyboard or dragging
+        # the mouse do not each read the trace file.
+        if self.tid_trace_preview is not None:
+            self.tk_top.after_cancel(self.tid_trace_preview)
+        self.tid_trace_preview = self.tk_top.after(80, self.__handle_selection_settled)
+
+
+    def __handle_selection_settled(self):
+        self.tid_trace_preview = None
+        sel = self.sel_obj.text_sel_get_selection()
         if len(sel) == 1:
             log_idx = self.log_idx_map[sel[0]]
             self.__show_trace_preview(log_idx)
@@ -256,9 +305,19 @@ class TestLogWidget:
             self.__clear_trace_preview()
 
 
+    def __invalidate_log_caches(self):
+        """ Discards data derived from log_idx_map; called after each modification of the map. """
+        self.mapped_sel = None
+        self.tc_name_lines = None
+
+
     def __get_mapped_selection(self):
-        sel = self.sel_obj.text_sel_get_selection()
-        return [self.log_idx_map[idx] for idx in sel]
+        # Result is cached until selection or content of the log change.
+        # Note callers must not modify the returned list.
+        if self.mapped_sel is None:
+            sel = self.sel_obj.text_sel_get_selection()
+            self.mapped_sel = [self.log_idx_map[idx] for idx in sel]
+        return self.mapped_sel
 
 
     def __append_new_result(self):
@@ -266,17 +325,20 @@ class TestLogWidget:
         log = test_db.test_results[log_idx]
 
         if self.__matches_filter(log):
+            self.__invalidate_log_caches()
             if self.opt_sort_modes:
-                list_idx = gtest_gui.bisect.bisect_left(self.log_idx_map, log_idx,
-                                                        self.__get_sort_key_fn())
+                sort_key = self.sort_key_fn(log_idx)
+                # Insert behind equal keys, as ties are ordered by result index
+                list_idx = bisect.bisect_right(self.sort_keys, sort_key)
                 self.log_idx_map.insert(list_idx, log_idx)
+                self.sort_keys.insert(list_idx, sort_key)
             else:
                 list_idx = len(self.log_idx_map)
                 self.log_idx_map.append(log_idx)
 
             txt = self.__format_log_line(log_idx)
 
-            line = "%d.0" % (list_idx + 1)
+            line = f"{list_idx + 1}.0"
             self.wid_log.insert(line, *txt)
 
             if self.sel_obj.text_sel_get_selection():
@@ -287,25 +349,42 @@ class TestLogWidget:
 
     def update_repetition_status(self, tc_name):
         """ Updates the result log after a change of the given test case's repetiton status. """
+        # Index of lines per test case name is built once for a series of updates
+        if self.tc_name_lines is None:
+            self.tc_name_lines = {}
+            for idx, log_idx in enumerate(self.log_idx_map):
+                self.tc_name_lines.setdefault(test_db.test_results[log_idx].tc_name, []).append(idx)
+
         match_fn = self.__get_filter_match_fn()
-        for idx in range(len(self.log_idx_map)):
+        rm_first = rm_end = -1
+        # Reverse order, so that removal of lines does not affect remaining indices
+        for idx in reversed(self.tc_name_lines.get(tc_name, [])):
             log_idx = self.log_idx_map[idx]
-            log = test_db.test_results[log_idx]
-            if log[0] == tc_name:
-                if match_fn(log):
-                    self.__update_log_line(idx, log_idx)
-                else:
-                    self.__remove_log_line(idx)
-                    idx -= 1
+            if match_fn(test_db.test_results[log_idx]):
+                self.__update_log_line(idx, log_idx)
+            elif idx + 1 == rm_first:
+                rm_first = idx  # extend range of consecutive lines to be removed
+            else:
+                if rm_first >= 0:
+                    self.__remove_log_lines(rm_first, rm_end)
+                rm_first = idx
+                rm_end = idx + 1
 
+        if rm_first >= 0:
+            self.__remove_log_lines(rm_first, rm_end)
 
-    def __remove_log_line(self, list_idx):
-        line_1 = "%d.0" % (list_idx + 1)
-        line_2 = "%d.0" % (list_idx + 2)
+
+    def __remove_log_lines(self, first_idx, end_idx):
+        line_1 = f"{first_idx + 1}.0"
+        line_2 = f"{end_idx + 1}.0"
         self.wid_log.delete(line_1, line_2)
 
-        del self.log_idx_map[list_idx]
-        self.sel_obj.text_sel_adjust_deletion(list_idx)
+        del self.log_idx_map[first_idx : end_idx]
+        if self.sort_keys:
+            del self.sort_keys[first_idx : end_idx]
+        self.__invalidate_log_caches()
+        for list_idx in reversed(range(first_idx, end_idx)):
+            self.sel_obj.text_sel_adjust_deletion(list_idx)
 
         if not self.sel_obj.text_sel_get_selection():
             self.__clear_trace_preview()
@@ -313,41 +392,70 @@ class TestLogWidget:
 
     def __update_log_line(self, list_idx, log_idx):
         txt = self.__format_log_line(log_idx)
-        line_1 = "%d.0" % (list_idx + 1)
-        line_2 = "%d.0" % (list_idx + 2)
+        line_1 = f"{list_idx + 1}.0"
+        line_2 = f"{list_idx + 2}.0"
 
         self.wid_log.replace(line_1, line_2, *txt)
         self.sel_obj.text_sel_show_selection()
 
 
-    def __format_log_line(self, log_idx):
+    def __format_log_line(self, log_idx, now=None):
+        """
+        Returns text and tags for displaying the given result in the log. The
+        result is cached, as the log is refilled from scratch upon each change
+        of filter or sort options. Cached entries are reused while the
+        executable, repetition status of the test case, and sort mode are
+        unchanged and relative timestamps shown in the text have not expired.
+        """
         log = test_db.test_results[log_idx]
-        now = time.time()
+        if now is None:
+            now = time.time()
+
+        exe = (test_db.test_exe_name, test_db.test_exe_ts)
+        if self.fmt_cache_exe != exe:
+            self.fmt_cache.clear()
+            self.fmt_cache_exe = exe
+
+        key = (log_idx, bool(self.opt_sort_modes))
+        rep = test_db.repeat_requests.get(log.tc_name)
+        entry = self.fmt_cache.get(key)
+        if (entry is not None) and (now < entry[1]) and (rep == entry[2]):
+            self.fmt_cache.move_to_end(key)
+            return entry[0]
+
+        tagged_txt, expiry = self.__format_log_line_uncached(log, now)
+
+        self.fmt_cache[key] = (tagged_txt, expiry, rep)
+        if len(self.fmt_cache) > FMT_CACHE_SIZE:
+            self.fmt_cache.popitem(last=False)
+        return tagged_txt
 
-        if not self.opt_sort_modes and (now - log[11] < 12*60*60):
-            txt = datetime.fromtimestamp(log[11]).strftime("%H:%M")
+
+    def __invalidate_fmt_cache(self):
+        """ Discards cached log lines; called when indices of results in the database change. """
+        self.fmt_cache.clear()
+
+
+    def __format_log_line_uncached(self, log, now):
+        # Expiry is the time after which relative timestamps in the text need update
+        expiry = math.inf
+        if not self.opt_sort_modes and (now - log.end_ts < 12*60*60):
+            txt = _format_minute_timestamp(log.end_ts // 60, "%H:%M")
+            expiry = log.end_ts + 12*60*60
         else:
-            txt = datetime.fromtimestamp(log[11]).strftime("%a %d.%m %H:%M")
-
-        if log[3] < 4:
-            if log[3] == 0:
-                txt += " Passed "
-            elif log[3] == 2:
-                txt += " Failed "
-            elif log[3] == 1:
-                txt += " Skipped "
-            else:
-                txt += " Crashed "
+            txt = _format_minute_timestamp(log.end_ts // 60, "%a %d.%m %H:%M")
 
-            txt += log[0]
+        if log.verdict < 4:
+            txt += VERDICT_LABELS[log.verdict]
+            txt += log.tc_name
 
-            if log[14]:
-                txt += ", seed " + log[14]
+            if log.seed:
+                txt += ", seed " + log.seed
 
-            if log[12]:
+            if log.is_valgrind:
                 txt += " under valgrind"
 
-            duration = log[10]
+            duration = log.duration
             if duration:
                 if duration < 10000:
                     txt += " (%d ms)" % duration
@@ -355,13 +463,13 @@ class TestLogWidget:
                     duration = duration // 1000
                     txt += " (%d seconds)" % duration
 
-            if log[8] or log[9]:
-                txt += " in %s, line %d" % (log[8], log[9])
+            if log.fail_file or log.fail_line:
+                txt += " in %s, line %d" % (log.fail_file, log.fail_line)
 
             tagged_txt = [txt, []]
 
-            if log[1] == test_db.test_exe_name:
-                rep = test_db.repeat_requests.get(log[0])
+            if log.exe_name == test_db.test_exe_name:
+                rep = test_db.repeat_requests.get(log.tc_name)
                 if rep is not None:
                     if rep == test_db.test_exe_ts:
                         tagged_txt.append(" (repeat with new executable)")
@@ -370,36 +478,37 @@ class TestLogWidget:
                     tagged_txt.append("highlight")
 
         else:
-            if log[3] == 4:
+            if log.verdict == 4:
                 txt += " Valgrind error at end of test run"
             else:
                 txt += " Error outside of test case"
             tagged_txt = [txt, []]
 
-        if log[13]:  # currently name and timestamp are unknown for imported trace
+        if log.import_flag:  # currently name and timestamp are unknown for imported trace
             tagged_txt.append(" (imported)")
             tagged_txt.append([])
 
-        elif log[1] != test_db.test_exe_name:
-            if log[1] is None:
+        elif log.exe_name != test_db.test_exe_name:
+            if log.exe_name is None:
                 tagged_txt.append(" (unknown executable)")
                 tagged_txt.append([])
             else:
-                tagged_txt.append(" (%s)" % os.path.basename(log[1]))
+                tagged_txt.append(" (%s)" % os.path.basename(log.exe_name))
                 tagged_txt.append([])
 
-        elif log[2] != test_db.test_exe_ts:
-            if now - log[2] <= 11*60*60:
-                tagged_txt.append(datetime.fromtimestamp(log[2]).strftime(
+        elif log.exe_ts != test_db.test_exe_ts:
+            if now - log.exe_ts <= 11*60*60:
+                tagged_txt.append(datetime.fromtimestamp(log.exe_ts).strftime(
                     " (old exe: %H:%M:%S)"))
                 tagged_txt.append([])
+                expiry = min(expiry, log.exe_ts + 11*60*60)
             else:
-                tagged_txt.append(datetime.fromtimestamp(log[2]).strftime(
+                tagged_txt.append(datetime.fromtimestamp(log.exe_ts).strftime(
                     " (old exe: %a %d.%m %H:%M)"))
                 tagged_txt.append([])
 
         tagged_txt.extend(["\n", []])
-        return tagged_txt
+        return (tagged_txt, expiry)
 
 
     def populate_log(self):
@@ -407,20 +516,35 @@ class TestLogWidget:
         Refill the result log widget with results in the database from scratch
         and set the view to the last item in the list.
         """
-        self.wid_log.delete("1.0", "end")
-
         match_fn = self.__get_filter_match_fn()
-        logs = [idx for idx in range(len(test_db.test_results))
-                if match_fn(test_db.test_results[idx])]
-
-        self.log_idx_map = self.__sort_idx_map(logs)
+        self.filter_match_fn = match_fn
+        if match_fn is _match_all_filter:
+            logs = list(range(len(test_db.test_results)))
+        else:
+            logs = [idx for idx, log in enumerate(test_db.test_results) if match_fn(log)]
+
+        if self.opt_sort_modes:
+            # Sort in a single pass using a composite key, which is evaluated only
+            # once per element. Ties keep the order of results in the database.
+            # Keys are kept for determining the position of new results via bisect.
+            key_fn = self.sort_key_fn
+            sorted_logs = sorted((key_fn(idx), idx) for idx in logs)
+            self.log_idx_map = [x[1] for x in sorted_logs]
+            self.sort_keys = [x[0] for x in sorted_logs]
+        else:
+            self.log_idx_map = logs
+            self.sort_keys = []
+        self.__invalidate_log_caches()
 
+        # Text and tags of all lines are passed to Tk in a single command
         content = []
+        now = time.time()
         for log_idx in self.log_idx_map:
-            content.extend(self.__format_log_line(log_idx))
+            content.extend(self.__format_log_line(log_idx, now))
         if content:
-            # pylint: disable=no-value-for-parameter # false positive b/c content never empty
-            self.wid_log.insert("end", *content)
+            self.wid_log.replace("1.0", "end", *content)
+        else:
+            self.wid_log.delete("1.0", "end")
 
 
     def __refill_log(self, restore_view=False, restore_selection=False):
@@ -434,97 +558,99 @@ class TestLogWidget:
         self.populate_log()
 
         if restore_selection and prev_log_idx is not None:
-            try:
-                new_sel = self.log_idx_map.index(prev_log_idx)
-            except ValueError:
-                pass
+            new_sel = self.__find_log_line(prev_log_idx)
 
         if restore_view:
             self.wid_log.yview_moveto(prev_yview)
         else:
-            self.wid_log.see("end - 1 lines")
+            self.wid_log.yview_moveto(1.0)
 
         if restore_view and (self.log_idx_map == prev_log):
             self.sel_obj.text_sel_set_selection(prev_sel)
         elif restore_selection and new_sel is not None:
-            self.wid_log.see("%d.0" % (new_sel + 1))
+            self.wid_log.see(f"{new_sel + 1}.0")
             self.sel_obj.text_sel_set_selection([new_sel])
         else:
             self.sel_obj.text_sel_set_selection([])
             self.__clear_trace_preview()
 
 
-    def __sort_idx_map(self, logs):
-        for mode in reversed(self.opt_sort_modes):
-            if mode == SortMode.by_name:
-                logs = sorted(logs, key=lambda x: test_db.test_results[x][0])
-            elif mode == SortMode.by_failure:
-                logs = sorted(logs, key=lambda x: test_db.test_results[x][9])
-                logs = sorted(logs, key=lambda x: test_db.test_results[x][8])
-            elif mode == SortMode.by_duration:
-                logs = sorted(logs, key=lambda x: test_db.test_results[x][10])
-            elif mode == SortMode.by_seed:
-                logs = sorted(logs, key=lambda x: test_db.test_results[x][14])
-        return logs
-
-
-    def __get_sort_key_fn(self):
-        if len(self.opt_sort_modes) == 1:
-            mode = self.opt_sort_modes[0]
-            if mode == SortMode.by_name:
-                return lambda x: test_db.test_results[x][0]
+    def __find_log_line(self, log_idx):
+        """
+        Returns the index of the line showing the given result in the log, or
+        None if the result is not shown. The line is located via bisection, as
+        lines are ordered by sort key and by result index within equal keys.
+        """
+        if self.opt_sort_modes:
+            sort_key = self.sort_key_fn(log_idx)
+            lo_idx = bisect.bisect_left(self.sort_keys, sort_key)
+            hi_idx = bisect.bisect_right(self.sort_keys, sort_key, lo_idx)
+        else:
+            lo_idx = 0
+            hi_idx = len(self.log_idx_map)
 
-            if mode == SortMode.by_failure:
-                return lambda x: (test_db.test_results[x][8], test_db.test_results[x][9])
+        list_idx = bisect.bisect_left(self.log_idx_map, log_idx, lo_idx, hi_idx)
+        if (list_idx < hi_idx) and (self.log_idx_map[list_idx] == log_idx):
+            return list_idx
+        return None
 
-            if mode == SortMode.by_duration:
-                return lambda x: test_db.test_results[x][10]
 
-            if mode == SortMode.by_seed:
-                return lambda x: test_db.test_results[x][14]
+    def __get_sort_key_fields(self):
+        key_fields = []
+        for mode in self.opt_sort_modes:
+            if mode == SortMode.by_name:
+                key_fields.append("tc_name")
 
-        elif len(self.opt_sort_modes) > 1:
-            key_idx = []
-            for mode in self.opt_sort_modes:
-                if mode == SortMode.by_name:
-                    key_idx.append(0)
+            elif mode == SortMode.by_failure:
+                key_fields.append("fail_file")
+                key_fields.append("fail_line")
 
-                elif mode == SortMode.by_failure:
-                    key_idx.append(8)
-                    key_idx.append(9)
+            elif mode == SortMode.by_duration:
+                key_fields.append("duration")
 
-                elif mode == SortMode.by_duration:
-                    key_idx.append(10)
+            elif mode == SortMode.by_seed:
+                key_fields.append("seed")
 
-                elif mode == SortMode.by_seed:
-                    key_idx.append(14)
+        return key_fields
 
-            return lambda log_idx: [test_db.test_results[log_idx][x] for x in key_idx]
 
-        return lambda x: x
+    def __get_sort_key_fn(self):
+        """
+        Returns a function that determines the sort key for a given result
+        index. The function is specialized for the current sort modes and
+        thus is created only when these change.
+        """
+        if not self.opt_sort_modes:
+            return None
+        key_getter = operator.attrgetter(*self.__get_sort_key_fields())
+        # Note the result list is not bound, as it is replaced when deleting results
+        return lambda log_idx: key_getter(test_db.test_results[log_idx])
 
 
     def __matches_filter(self, log):
         """
-        Check if the given resultlog entry matches current result log filter configuration.
+        Check if the given resultlog entry matches current result log filter
+        configuration. The filter function is cached, so that filter options
+        are not queried for each result. The cache is invalidated upon filter
+        variable changes and replaced when refilling the log, which follows all
+        changes of other filter parameters.
         """
-        return (((not self.var_opt_filter_pass.get()) or
-                 (log[3] >= 2)) and
-                ((not self.var_opt_filter_exe_name.get()) or
-                 (log[1] == test_db.test_exe_name)) and
-                ((not self.var_opt_filter_exe_ts.get()) or
-                 ((log[2] >= self.opt_filter_exe_ts) and (log[1] == test_db.test_exe_name))) and
-                ((not self.var_opt_filter_tc_name.get()) or
-                 (log[0] in self.opt_filter_tc_names)))
+        if self.filter_match_fn is None:
+            self.filter_match_fn = self.__get_filter_match_fn()
+        return self.filter_match_fn(log)
+
+
+    def __invalidate_filter_match_fn(self, *_args):
+        self.filter_match_fn = None
 
 
     def __get_filter_match_fn(self):
         """
-        Returns a lambda function that when invoked, performs an equivalent
-        check as function __matches_filter(). This should be used when
-        filtering is done on many log items in a loop. Using the returned
-        lambda is faster than calling the generic filter function directly, as
-        it performs fewer comparisons.
+        Returns a lambda function that when invoked, checks if a given result
+        log entry matches the current filter configuration. The function is
+        specialized for the current filter options, so that it performs only
+        the needed comparisons. It should be used directly when filtering is
+        done on many log items in a loop.
         """
         filter_pass = self.var_opt_filter_pass.get()
         filter_exe_name = self.var_opt_filter_exe_name.get()
@@ -534,39 +660,83 @@ class TestLogWidget:
         nof_filters = sum((filter_pass, filter_exe_name, filter_exe_ts, filter_tc_name))
 
         if nof_filters == 0:
-            return lambda log: True
+            return _match_all_filter
 
         if nof_filters == 1:
             if filter_pass:
-                return lambda log: (log[3] >= 2)
+                return lambda log: (log.verdict >= 2)
             if filter_exe_name:
-                return lambda log, exe_name=test_db.test_exe_name: (log[1] == exe_name)
+                return lambda log, exe_name=test_db.test_exe_name: (log.exe_name == exe_name)
             if filter_exe_ts:
                 return lambda log, \
                               exe_ts=self.opt_filter_exe_ts, \
                               exe_name=test_db.test_exe_name: \
-                                ((log[2] >= exe_ts) and (log[1] == exe_name))
+                                ((log.exe_ts >= exe_ts) and (log.exe_name == exe_name))
             # else: filter_tc_name
-            return lambda log, names=self.opt_filter_tc_names: (log[0] in names)
+            return lambda log, names=self.opt_filter_tc_names: (log.tc_name in names)
 
         # else: nof_filters > 1
         return lambda log, \
                       exe_ts=self.opt_filter_exe_ts, \
                       exe_name=test_db.test_exe_name, \
                       names=self.opt_filter_tc_names: \
-                ((not filter_pass or (log[3] >= 2)) and
-                 (not filter_exe_name or (log[1] == exe_name)) and
-                 (not filter_exe_ts or ((log[2] >= exe_ts) and (log[1] == exe_name))) and
-                 (not filter_tc_name or (log[0] in names)))
+                ((not filter_pass or (log.verdict >= 2)) and
+                 (not filter_exe_name or (log.exe_name == exe_name)) and
+                 (not filter_exe_ts or ((log.exe_ts >= exe_ts) and (log.exe_name == exe_name))) and
+                 (not filter_tc_name or (log.tc_name in names)))
+
+
+    def __refilter_log(self):
+        """
+        Updates the result log after a change of filter options. When the new
+        filter only hides lines currently shown, these lines are removed from
+        the widget, so that remaining lines keep their content and selection.
+        Otherwise, or when many separate ranges would need to be removed, the
+        log is refilled from scratch.
+        """
+        match_fn = self.__get_filter_match_fn()
+        results = test_db.test_results
+        keep = [match_fn(results[log_idx]) for log_idx in self.log_idx_map]
+
+        if sum(keep) != sum(1 for log in results if match_fn(log)):
+            self.__refill_log(restore_selection=True)
+            return
+
+        # Collect ranges of lines to be removed in reverse order
+        rm_ranges = []
+        rm_end = -1
+        for idx in range(len(keep) - 1, -1, -1):
+            if not keep[idx]:
+                if rm_end < 0:
+                    rm_end = idx + 1
+            elif rm_end >= 0:
+                rm_ranges.append((idx + 1, rm_end))
+                rm_end = -1
+        if rm_end >= 0:
+            rm_ranges.append((0, rm_end))
+
+        if len(rm_ranges) > REFILTER_MAX_RANGES:
+            self.__refill_log(restore_selection=True)
+            return
+
+        self.filter_match_fn = match_fn
+        for first_idx, end_idx in rm_ranges:
+            self.__remove_log_lines(first_idx, end_idx)
+
+        sel = self.sel_obj.text_sel_get_selection()
+        if sel:
+            self.wid_log.see(f"{sel[0] + 1}.0")
+        else:
+            self.wid_log.see("end - 1 lines")
 
 
     def __toggle_verdict_filter(self):
-        self.__refill_log(restore_selection=True)
+        self.__refilter_log()
 
 
     def __toggle_exe_name_filter(self):
         if test_db.test_exe_name:
-            self.__refill_log(restore_selection=True)
+            self.__refilter_log()
 
         else:
             self.var_opt_filter_exe_name.set(False)
@@ -580,7 +750,7 @@ class TestLogWidget:
                 exe_ts = test_db.test_exe_ts
 
             self.opt_filter_exe_ts = exe_ts
-            self.__refill_log(restore_selection=True)
+            self.__refilter_log()
 
         elif self.var_opt_filter_exe_ts.get():
             self.var_opt_filter_exe_ts.set(False)
@@ -591,7 +761,7 @@ class TestLogWidget:
     def __toggle_tc_name_filter(self, tc_names=None):
         if self.var_opt_filter_tc_name.get():
             if tc_names is None:
-                tc_names = [test_db.test_results[log_idx][0]
+                tc_names = [test_db.test_results[log_idx].tc_name
                             for log_idx in self.__get_mapped_selection()]
             if not tc_names:
                 self.var_opt_filter_tc_name.set(False) # must come before messagebox
@@ -602,41 +772,50 @@ class TestLogWidget:
         else:
             self.opt_filter_tc_names = None
 
-        self.__refill_log(restore_selection=True)
+        self.__refilter_log()
 
 
     def __toggle_sort_mode(self, enable, mode):
         self.opt_sort_modes = [x for x in self.opt_sort_modes if x != mode]
         if enable:
             self.opt_sort_modes.append(mode)
+        self.sort_key_fn = self.__get_sort_key_fn()
 
         self.__refill_log(restore_selection=True)
 
 
     def __delete_multiple_results(self, idx_list):
         test_db.delete_results(idx_list)
+        self.__invalidate_fmt_cache()
         self.__refill_log()
 
 
     def __delete_single_result(self, idx):
-        log_idx = bisect.bisect_left(self.log_idx_map, idx)
-        if (log_idx >= len(self.log_idx_map)) or (self.log_idx_map[log_idx] != idx):
-            raise ValueError
+        list_idx = self.__find_log_line(idx)
+        if list_idx is not None:
+            line_1 = f"{list_idx + 1}.0"
+            line_2 = f"{list_idx + 2}.0"
+            self.wid_log.delete(line_1, line_2)
+
+            self.sel_obj.text_sel_adjust_deletion(list_idx)
+            if not self.sel_obj.text_sel_get_selection():
+                self.__clear_trace_preview()
 
-        line_1 = "%d.0" % (log_idx + 1)
-        line_2 = "%d.0" % (log_idx + 2)
-        self.wid_log.delete(line_1, line_2)
-
-        self.sel_obj.text_sel_adjust_deletion(log_idx)
-        if not self.sel_obj.text_sel_get_selection():
-            self.__clear_trace_preview()
+            del self.log_idx_map[list_idx]
+            if self.sort_keys:
+                del self.sort_keys[list_idx]
 
         test_db.delete_results([idx])
+        self.__invalidate_fmt_cache()
 
-        new_list = self.log_idx_map[:log_idx]
-        if log_idx + 1 < len(self.log_idx_map):
-            new_list.extend([x - 1 for x in self.log_idx_map[log_idx + 1:]])
-        self.log_idx_map = new_list
+        # Adjust indices of following results in place
+        if not self.opt_sort_modes:
+            if list_idx is None:
+                list_idx = bisect.bisect_left(self.log_idx_map, idx)
+            self.log_idx_map[list_idx:] = [x - 1 for x in self.log_idx_map[list_idx:]]
+        else:
+            self.log_idx_map[:] = [(x - 1 if x > idx else x) for x in self.log_idx_map]
+        self.__invalidate_log_caches()
 
 
     def __post_context_menu(self, parent, xcoo, ycoo):
@@ -660,9 +839,9 @@ class TestLogWidget:
 
             for log_idx in sel:
                 log = test_db.test_results[log_idx]
-                if log[4]:
+                if log.trace_file:
                     any_with_trace = True
-                tc_name = log[0]
+                tc_name = log.tc_name
                 if tc_name in all_tc_names:
                     sel_tc_names.append(tc_name)
                     if test_db.repeat_requests.get(tc_name) is not None:
@@ -676,19 +855,19 @@ class TestLogWidget:
 
             if len(sel) == 1:
                 log = test_db.test_results[sel[0]]
-                if log[4]:
+                if log.trace_file:
                     wid_men.add_command(label="Open trace of this test case",
                                         command=lambda: self.__do_open_trace_browser(False))
                     wid_men.add_command(label="Open trace of complete test run",
                                         command=lambda: self.__do_open_trace_browser(True))
 
-                if log[7]:
+                if log.core_file:
                     wid_men.add_command(label="Extract stack trace from core dump file",
-                                        command=lambda name=log[0], exe_name=log[1],
-                                                       exe_ts=log[2], core=log[7]:
+                                        command=lambda name=log.tc_name, exe_name=log.exe_name,
+                                                       exe_ts=log.exe_ts, core=log.core_file:
                                         self.__do_open_stack_trace(name, exe_name, exe_ts, core))
 
-                if log[4] or log[7]:
+                if log.trace_file or log.core_file:
                     wid_men.add_separator()
 
             need_sep = False
@@ -735,15 +914,12 @@ class TestLogWidget:
             need_sep = False
             post_menu = True
 
-        for log in test_db.test_results:
-            if ((log[3] == 0) and
-                    ((log[1] != test_db.test_exe_name) or (log[2] < test_db.test_exe_ts))):
-                if need_sep:
-                    wid_men.add_separator()
-                wid_men.add_command(label="Remove results of passed tests from old exe.",
-                                    command=self.__do_remove_old_pass_results)
-                post_menu = True
-                break
+        if test_db.old_pass_count > 0:
+            if need_sep:
+                wid_men.add_separator()
+            wid_men.add_command(label="Remove results of passed tests from old exe.",
+                                command=self.__do_remove_old_pass_results)
+            post_menu = True
 
         if post_menu:
             tk_utils.post_context_menu(parent, xcoo, ycoo)
@@ -759,12 +935,8 @@ class TestLogWidget:
 
 
     def __do_remove_old_pass_results(self):
-        idx_list = []
-        for idx in range(len(test_db.test_results)):
-            log = test_db.test_results[idx]
-            if ((log[3] == 0) and
-                    ((log[1] != test_db.test_exe_name) or (log[2] < test_db.test_exe_ts))):
-                idx_list.append(idx)
+        idx_list = [idx for idx, log in enumerate(test_db.test_results)
+                    if test_db.is_old_pass_result(log)]
 
         if idx_list:
             self.__remove_trace_files(idx_list)
@@ -784,28 +956,26 @@ class TestLogWidget:
 
     def __remove_trace_files(self, idx_list):
         idx_list = sorted(idx_list)
+        rm_idx_set = set(idx_list)
         rm_trace_files = set()
         rm_core_files = set()
         rm_exe = set()
-        rm_idx = 0
         used_trace_files = set()
         used_exe = set()
-        for idx in range(len(test_db.test_results)):
-            log = test_db.test_results[idx]
-            if idx == idx_list[rm_idx]:
-                if log[4] and log[13] != 2:  # never remove traces imported via cmd line
-                    rm_trace_files.add(log[4])
-                if log[7]:
-                    rm_core_files.add(log[7])
-                    if log[1]:
-                        rm_exe.add((log[1], log[2]))
-                if rm_idx + 1 < len(idx_list):
-                    rm_idx += 1
+        for idx, log in enumerate(test_db.test_results):
+            if idx in rm_idx_set:
+                # never remove traces imported via command line
+                if log.trace_file and log.import_flag != 2:
+                    rm_trace_files.add(log.trace_file)
+                if log.core_file:
+                    rm_core_files.add(log.core_file)
+                    if log.exe_name:
+                        rm_exe.add((log.exe_name, log.exe_ts))
             else:
-                if log[4]:
-                    used_trace_files.add(log[4])
-                if log[7] and log[1]:
-                    used_exe.add((log[1], log[2]))
+                if log.trace_file:
+                    used_trace_files.add(log.trace_file)
+                if log.core_file and log.exe_name:
+                    used_exe.add((log.exe_name, log.exe_ts))
 
         rm_trace_files -= used_trace_files
         rm_trace_files -= gtest_ctrl.gtest_ctrl.get_out_file_names()
@@ -852,14 +1022,15 @@ class TestLogWidget:
     def __check_tc_names_in_exe(self, sel):
         for idx in sel:
             log = test_db.test_results[idx]
-            if log[1] and (log[1] != test_db.test_exe_name):
-                msg = 'Test case "%s" is from a different executable file "%s".' % (log[0], log[1])
+            if log.exe_name and (log.exe_name != test_db.test_exe_name):
+                msg = ('Test case "%s" is from a different executable file "%s".'
+                       % (log.tc_name, log.exe_name))
                 tk_messagebox.showerror(parent=self.tk_top, message=msg)
                 return False
 
-            if test_db.test_case_stats.get(log[0], None) is None:
-                msg = 'Test case "%s" no longer exists in current executable' % log[0]
-                if log[1] is None:
+            if test_db.test_case_stats.get(log.tc_name, None) is None:
+                msg = 'Test case "%s" no longer exists in current executable' % log.tc_name
+                if log.exe_name is None:
                     msg += " or may be from a different executable"
                 tk_messagebox.showerror(parent=self.tk_top, message=msg + ".")
                 return False
@@ -879,20 +1050,21 @@ class TestLogWidget:
             if test_db.repeat_requests:
                 return True
 
+            sel = []
             for idx in self.log_idx_map:
                 log = test_db.test_results[idx]
-                if log[3] == 2 or log[3] == 3:
+                if log.verdict in (2, 3):
                     # Silently skip results from other executables or removed test cases
-                    if ((not log[1] or (log[1] == test_db.test_exe_name)) and
-                            (test_db.test_case_stats.get(log[0], None) is not None)):
+                    if ((not log.exe_name or (log.exe_name == test_db.test_exe_name)) and
+                            (test_db.test_case_stats.get(log.tc_name, None) is not None)):
                         sel.append(idx)
 
         if not self.__check_tc_names_in_exe(sel):
             return False
 
         for log in {test_db.test_results[x] for x in sel}:
-            if log[3] <= 3: # exclude valgrind summary error
-                tc_name = log[0]
+            if log.verdict <= 3: # exclude valgrind summary error
+                tc_name = log.tc_name
                 test_db.set_repetition_request(tc_name, enable_rep)
 
         return True
@@ -904,7 +1076,7 @@ class TestLogWidget:
             log = test_db.test_results[sel[0]]
 
             self.var_opt_filter_exe_ts.set(True)
-            self.__toggle_exe_ts_filter(log[2] + 1)
+            self.__toggle_exe_ts_filter(log.exe_ts + 1)
 
 
     def __do_export_trace(self):
@@ -921,34 +1093,183 @@ class TestLogWidget:
         sel = self.__get_mapped_selection()
         if len(sel) == 1:
             log = test_db.test_results[sel[0]]
-            if log[4]:
+            if log.trace_file:
                 if complete_trace:
-                    dlg_browser.show_trace(log[4])
+                    dlg_browser.show_trace(log.trace_file)
                 else:
-                    dlg_browser.show_trace_snippet(log[4], log[5], log[6], log[13] == 2)
+                    dlg_browser.show_trace_snippet(log.trace_file, log.trace_offs, log.trace_len,
+                                                   log.import_flag == 2)
             else:
                 StatusLineWidget.get().show_message("warning", "No trace available for this result")
 
 
     def __show_trace_preview(self, log_idx):
         log = test_db.test_results[log_idx]
-        if log[4]:
-            txt = trace_db.extract_trace(log[4], log[5], log[6])
-            if txt:
-                self.wid_trace.replace("1.0", "end", txt)
-                self.wid_trace.see("end - 1 lines")
-
-                if log[3] >= 2:
-                    line = self.wid_trace.search(": Failure", "1.0")
-                    if line:
-                        self.wid_trace.see(line + " linestart")
-                        self.wid_trace.tag_add("failure", line + " linestart", line + " lineend")
+        if log.trace_file:
+            self.__cancel_trace_preview_read()
+
+            # Access the file in a separate thread, so that the GUI does not block on
+            # slow disks; the result is collected via polling. The thread reads the file
+            # only if the trace is not found in a snapshot of the cache.
+            cached_keys = frozenset(self.trace_cache)
+            result = []
+            thr = threading.Thread(
+                target=lambda: result.append(
+                    TestLogWidget.__read_trace_preview(log, cached_keys)),
+                daemon=True)
+            thr.start()
+            self.tid_trace_read = self.tk_top.after(
+                TRACE_READ_POLL_DELAY, lambda: self.__poll_trace_preview_read(thr, result))
+        else:
+            self.__clear_trace_preview()
 
-            else:
-                self.__clear_trace_preview()
+
+    @staticmethod
+    def __read_trace_preview(log, cached_keys):
+        """
+        Determines the cache key of the trace snippet of the given result. If
+        the key is not in the given set of cached keys, also reads the trace
+        snippet and determines the numbers of lines to be highlighted. Note
+        this function is called in context of a secondary thread.
+        """
+        key = TestLogWidget.__get_trace_cache_key(log.trace_file, log.trace_offs,
+                                                  log.trace_len)
+        if key in cached_keys:
+            return (key, None)
+
+        txt = trace_db.extract_trace(log.trace_file, log.trace_offs, log.trace_len)
+        fail_lines = []
+        if txt and log.verdict >= 2:
+            # search in the string rather than the widget, which is much faster
+            line = 1
+            prev_pos = 0
+            for match in RE_TRACE_FAILURE.finditer(txt):
+                pos = match.start()
+                line += txt.count("\n", prev_pos, pos)
+                if not fail_lines or fail_lines[-1] != line:
+                    fail_lines.append(line)
+                prev_pos = pos
+
+        return (key, (txt, fail_lines))
+
+
+    def __poll_trace_preview_read(self, thr, result):
+        if thr.is_alive():
+            self.tid_trace_read = self.tk_top.after(
+                TRACE_READ_POLL_DELAY, lambda: self.__poll_trace_preview_read(thr, result))
+            return
+
+        self.tid_trace_read = None
+        if not result:
+            self.__clear_trace_preview()
+            return
+
+        key, entry = result[0]
+        if key == self.trace_preview_key:
+            return  # trace is already displayed
+
+        if entry is None:
+            # Entries of the snapshot are still present, as the cache is modified only
+            # here and reads for preceding selections are discarded
+            entry = self.trace_cache.get(key)
+            if entry is not None:
+                self.trace_cache.move_to_end(key)
+        elif entry[0]:
+            self.__add_trace_cache(key, entry)
+
+        if entry and entry[0]:
+            self.__display_trace_preview(entry[0], entry[1], key)
         else:
             self.__clear_trace_preview()
 
 
+    def __cancel_trace_preview_read(self):
+        # a possibly still running thread is left to finish; its result is discarded
+        if self.tid_trace_read is not None:
+            self.tk_top.after_cancel(self.tid_trace_read)
+            self.tid_trace_read = None
+
+
+    def __display_trace_preview(self, txt, fail_lines, key):
+        # Large traces are inserted in chunks via idle callbacks, so
+        # that the GUI remains responsive while Tk processes the text.
+        self.__cancel_trace_preview_insert()
+        self.wid_trace.replace("1.0", "end", txt[:64*1024])
+        self.trace_preview_key = key
+        self.__insert_trace_preview_tail(txt, 64*1024, fail_lines)
+
+
+    def __insert_trace_preview_tail(self, txt, off, fail_lines):
+        self.tid_trace_insert = None
+        if off < len(txt):
+            self.wid_trace.insert("end", txt[off : off + 256*1024])
+            self.tid_trace_insert = self.tk_top.after_idle(
+                lambda: self.__insert_trace_preview_tail(txt, off + 256*1024, fail_lines))
+        else:
+            # Complete all modifications of the content before adjusting the view.
+            # Note Tk defers re-layout and redraw to idle time, so there is
+            # no need for disabling the widget during the modifications.
+            if fail_lines:
+                # highlight all failures via a single call with multiple index pairs
+                ranges = []
+                for line in fail_lines:
+                    ranges.extend((f"{line}.0", f"{line}.0 lineend"))
+                # pylint: disable=no-value-for-parameter # false positive b/c ranges never empty
+                self.wid_trace.tag_add("failure", *ranges)
+
+            self.wid_trace.yview_moveto(1.0)
+            if fail_lines:
+                self.wid_trace.see(f"{fail_lines[0]}.0")
+
+
+    def __cancel_trace_preview_insert(self):
+        if self.tid_trace_insert is not None:
+            self.tk_top.after_cancel(self.tid_trace_insert)
+            self.tid_trace_insert = None
+
+
+    @staticmethod
+    def __get_trace_cache_key(file_name, file_offs, length):
+        """
+        Returns the key for the cache of most recently previewed trace
+        snippets, which avoids reading the trace file again when returning to
+        a previously selected result. The file's modification timestamp is
+        part of the key, as trace files may get rewritten when cleaning passed
+        results.
+        """
+        try:
+            mtime = os.stat(file_name).st_mtime_ns
+        except OSError:
+            mtime = None
+        return (file_name, mtime, file_offs, length)
+
+
+    def __add_trace_cache(self, key, entry):
+        self.trace_cache[key] = entry
+        if len(self.trace_cache) > 8:
+            self.trace_cache.popitem(last=False)
+
+
     def __clear_trace_preview(self):
+        # Also drop a pending update for a preceding selection, so that it does not reappear
+        if self.tid_trace_preview is not None:
+            self.tk_top.after_cancel(self.tid_trace_preview)
+            self.tid_trace_preview = None
+        self.__cancel_trace_preview_read()
+        self.__cancel_trace_preview_insert()
         self.wid_trace.delete("1.0", "end")
+        self.trace_preview_key = None
+
+
+def _match_all_filter(_log):
+    """ Filter function used when no result log filters are enabled. """
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_minute_timestamp(minute, fmt):
+    """
+    Formats the given timestamp, which is in units of minutes. This is
+    cached, as many results usually share the same minute.
+    """
+    return datetime.fromtimestamp(minute * 60).strftime(fmt)
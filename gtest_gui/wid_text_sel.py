@@ -21,8 +21,18 @@
 
 """ Implements the TextSelWidget class. """
 
+import bisect
+import functools
+
 import gtest_gui.tk_utils as tk_utils
 
+# Note on performance: Cost of the event handlers in this class is dominated
+# by calls into the Tcl interpreter (e.g. for tagging lines or mapping mouse
+# coordinates) and by operations on the list of selected lines. There are no
+# numeric loops, so JIT compilers such as Numba would not help here; instead
+# the number of Tcl calls per event is kept small and the selection list is
+# kept sorted for use with bisect.
+
 class TextSelWidget:
     """
     This class allows using a text widget in the way of a listbox, i.e.
@@ -46,64 +56,89 @@ class TextSelWidget:
         self.len_proc = len_proc
         # ID of "after" event handler while scrolling via mouse, or None
         self.scroll_tid = None
+        # Handler of the scrolling timer, reused for re-installing the timer
+        self.scroll_cb = None
         # Scrolling speed while dragging the mouse above or below the text window.
         self.scroll_speed = 0
+        # Widget height and font line height, cached while dragging the mouse
+        self.motion_win_h = None
+        self.motion_font_h = None
+        # Line under the mouse pointer at the last motion event while dragging, or -1
+        self.motion_line = -1
         # Anchor element index OR last selection cursor pos
         self.anchor_idx = -1
-        # List of indices of selected lines (starting at zero)
+        # List of indices of selected lines (starting at zero) in ascending order
         self.sel = []
-
-        self.wid.bind("<Control-ButtonPress-1>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_pick(e.x, e.y)))
-        self.wid.bind("<Shift-ButtonPress-1>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_resize(e.x, e.y)))
-        self.wid.bind("<ButtonPress-1>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_button(e.x, e.y)))
-        self.wid.bind("<ButtonRelease-1>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(self.__text_sel_motion_end))
+        # Runs of lines currently tagged as selected in the widget, or None if unknown
+        self.shown_runs = None
+        # Line index of the "insert" mark as currently set in the widget
+        self.shown_anchor = None
+
+        # Handlers are bound directly, returning "break" to stop further event processing
+        evt_handler = TextSelWidget.__evt_handler
+        self.wid.bind("<Control-ButtonPress-1>", self.__evt_pick)
+        self.wid.bind("<Shift-ButtonPress-1>", self.__evt_resize)
+        self.wid.bind("<ButtonPress-1>", self.__evt_button)
+        self.wid.bind("<ButtonRelease-1>", evt_handler(self.__text_sel_motion_end))
         if mode == "browse":
-            self.wid.bind("<B1-Motion>", lambda e, self=self:
-                          tk_utils.bind_call_and_break(lambda: self.__text_sel_button(e.x, e.y)))
+            self.wid.bind("<B1-Motion>", self.__evt_button)
         else:
-            self.wid.bind("<B1-Motion>", lambda e, self=self:
-                          tk_utils.bind_call_and_break(lambda: self.__text_sel_motion(e.x, e.y)))
-
-        self.wid.bind("<Shift-Key-Up>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_resize(-1)))
-        self.wid.bind("<Shift-Key-Down>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_resize(1)))
-        self.wid.bind("<Key-Up>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_up_down(-1)))
-        self.wid.bind("<Key-Down>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_up_down(1)))
-        self.wid.bind("<Shift-Key-Home>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_home_end(False,
-                                                                                        True)))
-        self.wid.bind("<Shift-Key-End>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_home_end(True,
-                                                                                        True)))
-        self.wid.bind("<Key-Home>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_home_end(False,
-                                                                                        False)))
-        self.wid.bind("<Key-End>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_home_end(True,
-                                                                                        False)))
-
-        self.wid.bind("<Control-Key-a>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(self.__text_sel_select_all))
-        self.wid.bind("<Control-Key-c>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.text_sel_copy_clipboard(True)))
-
-        self.wid.bind("<Key-Prior>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_page_up_down(-1)))
-        self.wid.bind("<Key-Next>", lambda e, self=self:
-                      tk_utils.bind_call_and_break(lambda: self.__text_sel_key_page_up_down(1)))
+            self.wid.bind("<B1-Motion>", self.__evt_motion)
+
+        self.wid.bind("<Shift-Key-Up>", evt_handler(self.__text_sel_key_resize, -1))
+        self.wid.bind("<Shift-Key-Down>", evt_handler(self.__text_sel_key_resize, 1))
+        self.wid.bind("<Key-Up>", evt_handler(self.__text_sel_key_up_down, -1))
+        self.wid.bind("<Key-Down>", evt_handler(self.__text_sel_key_up_down, 1))
+        self.wid.bind("<Shift-Key-Home>", evt_handler(self.__text_sel_key_home_end, False, True))
+        self.wid.bind("<Shift-Key-End>", evt_handler(self.__text_sel_key_home_end, True, True))
+        self.wid.bind("<Key-Home>", evt_handler(self.__text_sel_key_home_end, False, False))
+        self.wid.bind("<Key-End>", evt_handler(self.__text_sel_key_home_end, True, False))
+
+        self.wid.bind("<Control-Key-a>", evt_handler(self.__text_sel_select_all))
+        self.wid.bind("<Control-Key-c>", evt_handler(self.text_sel_copy_clipboard, True))
+
+        self.wid.bind("<Key-Prior>", evt_handler(self.__text_sel_key_page_up_down, -1))
+        self.wid.bind("<Key-Next>", evt_handler(self.__text_sel_key_page_up_down, 1))
+
+
+    @staticmethod
+    def __evt_handler(func, *args):
+        """
+        This helper function returns an event handler which invokes the given
+        function with the given parameters and then returns "break" for
+        stopping further processing of the event.
+        """
+        def handler(_event):
+            func(*args)
+            return "break"
+        return handler
+
+
+    def __evt_pick(self, event):
+        self.__text_sel_pick(event.x, event.y)
+        return "break"
+
+
+    def __evt_resize(self, event):
+        self.__text_sel_resize(event.x, event.y)
+        return "break"
+
+
+    def __evt_button(self, event):
+        self.__text_sel_button(event.x, event.y)
+        return "break"
+
+
+    def __evt_motion(self, event):
+        self.__text_sel_motion(event.x, event.y)
+        return "break"
 
 
     def text_sel_get_selection(self):
         """
         This is an interface function which allows outside users to retrieve a
-        list of selected elements (i.e. a list of indices)
+        list of selected elements (i.e. a list of indices) in ascending order.
+        Note the returned list must not be modified by the caller.
         """
         return self.sel
 
@@ -115,7 +150,8 @@ class TextSelWidget:
         """
         if len(sel) > 0:
             self.anchor_idx = sel[0]
-        self.sel = sel
+        self.sel = sorted(sel)
+        self.motion_line = -1
 
         self.text_sel_show_selection()
 
@@ -132,7 +168,7 @@ class TextSelWidget:
         line = self.__text_sel_coo2_line(xcoo, ycoo)
         if line != -1:
             if len(self.sel) != 0:
-                if not line in self.sel:
+                if not self.__is_selected(line):
                     # click was outside the current selection -> replace selection
                     self.text_sel_set_selection([line])
             else:
@@ -162,7 +198,7 @@ class TextSelWidget:
 
         # update display if the selection changed
         if old_sel != self.sel:
-            self.text_sel_show_selection()
+            self.__update_shown_selection()
             notify = True
 
         # invoke notification callback if an element was selected or de-selected
@@ -183,18 +219,23 @@ class TextSelWidget:
         # the anchor element is the one above which the mouse button was pressed
         # (the check here is for fail-safety only, should always be fulfilled)
         if self.anchor_idx >= 0:
-            win_h = self.wid.winfo_height()
+            # geometry is queried only once per drag, as motion events occur at high rate
+            if self.motion_win_h is None:
+                self.motion_win_h = self.wid.winfo_height()
+            win_h = self.motion_win_h
             # check if the mouse is still inside of the widget area
             if 0 <= ycoo < win_h:
                 # identify the item under the mouse pointer
                 line = self.__text_sel_coo2_line(xcoo, ycoo)
-                if line != -1:
-                    # build list of all consecutive indices between the anchor and the mouse pos.
+                # selection needs update only if the mouse was moved onto a different line
+                if line not in (-1, self.motion_line):
+                    self.motion_line = line
+                    # build range of all consecutive indices between the anchor and the mouse pos.
                     sel = TextSelWidget.__idx_range(self.anchor_idx, line)
                     # update display and invoke notification callback if the selection changed
-                    if sel != self.sel:
-                        self.sel = sel
-                        self.text_sel_show_selection()
+                    if not self.__sel_equals_range(sel):
+                        self.sel = list(sel)
+                        self.__update_shown_selection()
                         self.cb_proc(self.sel)
 
                 # cancel scrolling timer, as the mouse is now back inside the widget
@@ -205,8 +246,10 @@ class TextSelWidget:
             else:
                 # mouse is outside of the text widget - start scrolling
                 # scrolling speed is determined by how far the mouse is outside
-                font_h = tk_utils.tk_top.call("font", "metrics", self.wid.cget("font"),
-                                              "-linespace")
+                if self.motion_font_h is None:
+                    self.motion_font_h = tk_utils.tk_top.call("font", "metrics",
+                                                              self.wid.cget("font"), "-linespace")
+                font_h = self.motion_font_h
                 if ycoo < 0:
                     delta = 0 - ycoo
                 else:
@@ -220,12 +263,12 @@ class TextSelWidget:
                 if self.scroll_tid is None:
                     # start timer and remember it's ID to be able to cancel it later
                     delta = -1 if (ycoo < 0) else 1
-                    self.scroll_tid = tk_utils.tk_top.after(delay, lambda:
-                                                            self.__text_sel_motion_scroll(delta))
-                    self.scroll_delay = delay
+                    self.scroll_cb = functools.partial(self.__text_sel_motion_scroll, delta)
+                    self.scroll_tid = tk_utils.tk_top.after(delay, self.scroll_cb)
+                    self.scroll_speed = delay
                 else:
                     # timer already active - just update the delay
-                    self.scroll_delay = delay
+                    self.scroll_speed = delay
 
 
     def __text_sel_motion_scroll(self, delta):
@@ -243,11 +286,13 @@ class TextSelWidget:
         if delta < 0:
             self.__text_sel_motion(0, 0)
         else:
-            self.__text_sel_motion(0, self.wid.winfo_height() - 1)
+            # widget height is usually cached already by the motion handler
+            if self.motion_win_h is None:
+                self.motion_win_h = self.wid.winfo_height()
+            self.__text_sel_motion(0, self.motion_win_h - 1)
 
         # install the timer again (possibly with a changed delay if the mouse was moved)
-        self.scroll_tid = tk_utils.tk_top.after(self.scroll_speed,
-                                                lambda: self.__text_sel_motion_scroll(delta))
+        self.scroll_tid = tk_utils.tk_top.after(self.scroll_speed, self.scroll_cb)
 
 
     def __text_sel_motion_end(self):
@@ -255,9 +300,14 @@ class TextSelWidget:
         This function is boud to mouse button release events and stops a
         possible on-going scrolling timer.
         """
+        self.motion_win_h = None
+        self.motion_font_h = None
+        self.motion_line = -1
+
         if self.scroll_tid is not None:
             tk_utils.tk_top.after_cancel(self.scroll_tid)
             self.scroll_tid = None
+        self.scroll_cb = None
 
 
     def __text_sel_pick(self, xcoo, ycoo):
@@ -271,18 +321,17 @@ class TextSelWidget:
         line = self.__text_sel_coo2_line(xcoo, ycoo)
         if line != -1:
             # check if the item is already selected
-            try:
-                pick_idx = self.sel.index(line)
+            pick_idx = bisect.bisect_left(self.sel, line)
+            if (pick_idx < len(self.sel)) and (self.sel[pick_idx] == line):
                 # already selected -> remove from selection
                 del self.sel[pick_idx]
-            except ValueError:
-                pick_idx = -1
-                self.sel.append(line)
+            else:
+                self.sel.insert(pick_idx, line)
 
             if len(self.sel) <= 1:
                 self.anchor_idx = line
 
-            self.text_sel_show_selection()
+            self.__update_shown_selection()
             self.cb_proc(self.sel)
 
 
@@ -297,8 +346,8 @@ class TextSelWidget:
         line = self.__text_sel_coo2_line(xcoo, ycoo)
         if line != -1:
             if self.anchor_idx != -1:
-                self.sel = TextSelWidget.__idx_range(self.anchor_idx, line)
-                self.text_sel_show_selection()
+                self.sel = list(TextSelWidget.__idx_range(self.anchor_idx, line))
+                self.__update_shown_selection()
                 self.cb_proc(self.sel)
             else:
                 self.__text_sel_button(xcoo, ycoo)
@@ -315,12 +364,12 @@ class TextSelWidget:
         if (delta < 0) and (self.wid.bbox("1.0") is not None):
             self.__text_sel_select_line(0)
 
-        elif (delta > 0) and (self.wid.bbox("%d.0" % content_len) is not None):
+        elif (delta > 0) and (self.wid.bbox(f"{content_len}.0") is not None):
             self.__text_sel_select_line(content_len - 1)
 
         else:
             if self.sel:
-                prev_line = min(self.sel) if delta < 0 else max(self.sel)
+                prev_line = self.sel[0] if delta < 0 else self.sel[-1]
             else:
                 prev_line = -1
 
@@ -346,7 +395,7 @@ class TextSelWidget:
         """
         content_len = self.len_proc()
         if content_len > 0:
-            sel = sorted(self.sel)
+            sel = self.sel
             if len(sel) != 0:
                 # selection already exists -> determine item below or above
                 if delta < 0:
@@ -372,14 +421,12 @@ class TextSelWidget:
 
             else:
                 # no selection exists yet -> use last anchor, or top/bottom visible line
-                if ((self.anchor_idx >= 0) and
-                        (self.wid.bbox("%d.0" % (self.anchor_idx + 1)) is not None)):
-                    idx = "%d.0" % (self.anchor_idx + 1)
-                else:
+                idx = f"{self.anchor_idx + 1}.0"
+                if (self.anchor_idx < 0) or (self.wid.bbox(idx) is None):
                     if delta > 0:
                         idx = "@1,1"
                     else:
-                        idx = "@1,%d" % (self.wid.winfo_height() - 1)
+                        idx = f"@1,{self.wid.winfo_height() - 1}"
 
                 pos = self.wid.index(idx)
                 if pos != "":
@@ -399,7 +446,7 @@ class TextSelWidget:
         """
         content_len = self.len_proc()
         if len(self.sel) > 0:
-            sel = sorted(self.sel)
+            sel = self.sel
             # decide if we manipulate the upper or lower end of the selection:
             # use the opposite side of the anchor element
             if self.anchor_idx == sel[-1]:
@@ -409,10 +456,10 @@ class TextSelWidget:
 
             line += delta
             if 0 <= line < content_len:
-                self.sel = TextSelWidget.__idx_range(self.anchor_idx, line)
+                self.sel = list(TextSelWidget.__idx_range(self.anchor_idx, line))
 
-                self.text_sel_show_selection()
-                self.wid.see("%d.0" % (line + 1))
+                self.__update_shown_selection()
+                self.wid.see(f"{line + 1}.0")
                 self.cb_proc(self.sel)
 
         else:
@@ -438,10 +485,10 @@ class TextSelWidget:
                 self.sel = [line]
             else:
                 if self.anchor_idx >= 0:
-                    self.sel = TextSelWidget.__idx_range(self.anchor_idx, line)
+                    self.sel = list(TextSelWidget.__idx_range(self.anchor_idx, line))
 
-            self.text_sel_show_selection()
-            self.wid.see("%d.0" % (line + 1))
+            self.__update_shown_selection()
+            self.wid.see(f"{line + 1}.0")
             self.cb_proc(self.sel)
 
 
@@ -452,21 +499,52 @@ class TextSelWidget:
         """
         content_len = self.len_proc()
         if content_len > 0:
-            self.sel = TextSelWidget.__idx_range(0, content_len - 1)
+            self.sel = list(range(content_len))
 
-            self.text_sel_show_selection()
+            self.__update_shown_selection()
             self.cb_proc(self.sel)
 
 
     @staticmethod
     def __idx_range(start, end):
         """
-        This helper function is used to build a list of all indices between
+        This helper function is used to build a range of all indices between
         (and including) two given values in increasing order.
         """
         if start > end:
-            return list(range(end, start + 1))
-        return list(range(start, end + 1))
+            return range(end, start + 1)
+        return range(start, end + 1)
+
+
+    def __sel_equals_range(self, rng):
+        """
+        This helper function checks if the selection consists of exactly the
+        indices in the given range. As the selection is sorted and free of
+        duplicates, it suffices to compare length and first and last element.
+        """
+        if len(self.sel) != len(rng):
+            return False
+        return (len(rng) == 0) or ((self.sel[0] == rng[0]) and (self.sel[-1] == rng[-1]))
+
+
+    @staticmethod
+    def __get_line_runs(lines):
+        """
+        This helper function splits the given sorted list of line indices into
+        runs of consecutive lines. The result is a list of pairs of first and
+        last line of each run.
+        """
+        # Shortcut for a single run, e.g. after selecting all lines via CTRL-A
+        if lines and (lines[-1] - lines[0] + 1 == len(lines)):
+            return [[lines[0], lines[-1]]]
+
+        runs = []
+        for line in lines:
+            if runs and (runs[-1][1] + 1 == line):
+                runs[-1][1] = line
+            else:
+                runs.append([line, line])
+        return runs
 
 
     def text_sel_show_selection(self):
@@ -478,14 +556,67 @@ class TextSelWidget:
         # first remove any existing highlight
         self.wid.tag_remove("sel", "1.0", "end")
 
-        # select each selected line (may be non-consecutive)
-        for line in self.sel:
-            self.wid.tag_add("sel", "%d.0" % (line + 1), "%d.0" % (line + 2))
+        # select all ranges of consecutive selected lines via a single command
+        runs = TextSelWidget.__get_line_runs(self.sel)
+        if runs:
+            ranges = []
+            for first, last in runs:
+                ranges.append(f"{first + 1}.0")
+                ranges.append(f"{last + 2}.0")
+            self.wid.tag_add("sel", *ranges)
+        self.shown_runs = runs
+
+        self.shown_anchor = None
+        self.__show_anchor()
+
+
+    def __update_shown_selection(self):
+        """
+        This function updates the display of the selection after a change via
+        key or mouse bindings. If the selection consisted of a single run of
+        lines before and after the change, only lines which were added to or
+        removed from the selection are updated. This is the common case while
+        extending the selection via mouse or keyboard.
+        """
+        runs = TextSelWidget.__get_line_runs(self.sel)
+        if runs != self.shown_runs:
+            if ((self.shown_runs is None) or (len(self.shown_runs) != 1) or (len(runs) != 1) or
+                    (runs[0][1] < self.shown_runs[0][0]) or (runs[0][0] > self.shown_runs[0][1])):
+                self.text_sel_show_selection()
+                return
+
+            # both are overlapping single runs: update only differences at either end
+            old_first, old_last = self.shown_runs[0]
+            first, last = runs[0]
+            if old_first < first:
+                self.wid.tag_remove("sel", f"{old_first + 1}.0", f"{first + 1}.0")
+            elif first < old_first:
+                self.wid.tag_add("sel", f"{first + 1}.0", f"{old_first + 1}.0")
+            if last < old_last:
+                self.wid.tag_remove("sel", f"{last + 2}.0", f"{old_last + 2}.0")
+            elif old_last < last:
+                self.wid.tag_add("sel", f"{old_last + 2}.0", f"{last + 2}.0")
+            self.shown_runs = runs
+
+        self.__show_anchor()
+
 
+    def __show_anchor(self):
+        """
+        This function places the insertion cursor at the anchor element, as
+        long as the selection is not empty. The mark is set only if changed.
+        """
         if (len(self.sel) == 0) or (self.anchor_idx == -1):
-            self.wid.mark_set("insert", "end")
+            anchor = -1
         else:
-            self.wid.mark_set("insert", "%d.0" % (self.anchor_idx + 1))
+            anchor = self.anchor_idx
+
+        if anchor != self.shown_anchor:
+            if anchor == -1:
+                self.wid.mark_set("insert", "end")
+            else:
+                self.wid.mark_set("insert", f"{anchor + 1}.0")
+            self.shown_anchor = anchor
 
 
     def __text_sel_select_line(self, line):
@@ -495,17 +626,25 @@ class TextSelWidget:
         self.anchor_idx = line
         self.sel = [line]
 
-        self.text_sel_show_selection()
-        self.wid.see("%d.0" % (line + 1))
+        self.__update_shown_selection()
+        self.wid.see(f"{line + 1}.0")
         self.cb_proc(self.sel)
 
 
+    def __is_selected(self, line):
+        """
+        This function checks if the given line is included in the selection.
+        """
+        idx = bisect.bisect_left(self.sel, line)
+        return (idx < len(self.sel)) and (self.sel[idx] == line)
+
+
     def __text_sel_coo2_line(self, xcoo, ycoo):
         """
         This function determines the line under the mouse pointer.
         If the pointer is not above a content line, -1 is returned.
         """
-        pos = self.wid.index("@%d,%d" % (xcoo, ycoo))
+        pos = self.wid.index(f"@{xcoo},{ycoo}")
         if pos != "":
             line = int(pos.split(".")[0]) - 1
             if 0 <= line < self.len_proc():
@@ -519,7 +658,13 @@ class TextSelWidget:
         list to adapt the selection: Indices following the insertion are
         incremented.  The new element is not included in the selection.
         """
-        self.sel = [(x if x < line else x+1) for x in self.sel]
+        self.motion_line = -1
+        self.shown_runs = None
+        self.shown_anchor = None
+        # only the tail of the sorted list following the insertion is affected
+        idx = bisect.bisect_left(self.sel, line)
+        if idx < len(self.sel):
+            self.sel[idx:] = [x + 1 for x in self.sel[idx:]]
 
         if self.anchor_idx >= line:
             self.anchor_idx += 1
@@ -532,7 +677,14 @@ class TextSelWidget:
         to adapt the list of selected lines: The deleted line is removed from
         the selection (if included) and following indices are decremented.
         """
-        self.sel = [(x if x < line else x-1) for x in self.sel if x != line]
+        self.motion_line = -1
+        self.shown_runs = None
+        self.shown_anchor = None
+        # only the tail of the sorted list following the deletion is affected
+        idx = bisect.bisect_left(self.sel, line)
+        if idx < len(self.sel):
+            end_idx = idx + 1 if (self.sel[idx] == line) else idx
+            self.sel[idx:] = [x - 1 for x in self.sel[end_idx:]]
 
         if self.anchor_idx > line:
             self.anchor_idx -= 1
@@ -542,6 +694,6 @@ class TextSelWidget:
         This handler is bound to CTRL-C in the selection and performs <<Copy>>
         (i.e. copies the content of all selected lines to the clipboard.)
         """
-        msg = "".join([self.wid.get("%d.0" % (line + 1), "%d.0" % (line + 2))
-                       for line in self.sel])
+        msg = "".join([self.wid.get(f"{first + 1}.0", f"{last + 2}.0")
+                       for first, last in TextSelWidget.__get_line_runs(self.sel)])
         tk_utils.xselection_export(msg, to_clipboard)
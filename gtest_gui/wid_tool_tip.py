@@ -21,8 +21,10 @@
 Implements the tool-tip widget class and a tool-tipped menu class.
 """
 
-import re
+import functools
+import time
 import tkinter as tk
+import weakref
 
 import gtest_gui.tk_utils as tk_utils
 from gtest_gui.tool_tip_db import TOOL_TIP_DB
@@ -48,11 +50,33 @@ def tool_tip_add(wid, key):
 
 # ---- below is private ----
 
+# Delay in milliseconds after the mouse stops moving until a tool-tip is displayed
+TIP_DELAY = 1000
+
+# Bind tag shared by all tool-tipped widgets for Motion and Leave event handlers
+TIP_BIND_TAG = "GtestGuiToolTip"
+
+
+@functools.lru_cache(maxsize=None)
+def _get_tip_text(key):
+    """
+    Returns the help text for the given key in the tool tip database, with
+    line breaks replaced by blanks for automatic formatting. The result is
+    cached, as menu tool-tips are queried upon mouse motion.
+    """
+    return TOOL_TIP_DB[key].strip().replace("\n", " ")
+
 
 class ToolTipWidget:
     """ Event handler class for all widgets with registered tool-tips """
     singleton = None
 
+    # Attributes are accessed for each mouse motion event on tool-tipped widgets
+    __slots__ = ("__enable_tips", "__timer_id", "__wid_anchor", "__wid_tip",
+                 "__cur_msg", "__cur_msg_x", "__cur_msg_y", "__under_construction",
+                 "__motion_args", "__motion_ts", "__unbound_wids",
+                 "__screen_size", "__class_bound")
+
     @classmethod
     def get_instance(cls):
         """ Returns the singleton instance implemented by the class. """
@@ -71,30 +95,95 @@ class ToolTipWidget:
         self.__wid_anchor = None
         self.__wid_tip = None
         self.__cur_msg = ""
+        self.__cur_msg_x = 0
+        self.__cur_msg_y = 0
         self.__under_construction = False
+        self.__motion_args = None
+        self.__motion_ts = 0
+        self.__unbound_wids = weakref.WeakSet()
+        self.__screen_size = None
+        self.__class_bound = False
 
 
     def enable_all(self, enable):
         """
         Notifies about a configuration change of the tool-tip enable flag.
+        Event bindings for widgets registered while tool-tips were disabled
+        are added upon enabling.
         """
         self.__enable_tips = enable
+        if enable:
+            for wid in list(self.__unbound_wids):
+                if tk_utils.wid_exists(wid):
+                    self.__bind_events(wid)
+            self.__unbound_wids.clear()
 
 
     def add_tool_tip(self, wid, key):
         """
         Registers a given tool-tip help text for the given widget. Registration
-        is done by adding Motion and Leave events on the widget, which are used
-        to detect when the mouse is hovering for a certain minimum time over
-        the widget.
+        is done by adding a bind tag with handlers for Motion and Leave events
+        to the widget, which are used to detect when the mouse is hovering for a
+        certain minimum time over the widget. While tool-tips are disabled,
+        binding is postponed, except for menus (see below).
         """
         if callable(key):
             msg = key
         else:
-            msg = re.sub(r"\n", " ", TOOL_TIP_DB[key].strip())
+            msg = _get_tip_text(key)
+
+        wid.tooltip_msg = msg
+        if isinstance(wid, tk.Menu):
+            self.__bind_menu_events(wid)
+        elif self.__enable_tips:
+            self.__bind_events(wid)
+        else:
+            self.__unbound_wids.add(wid)
+
+
+    def __bind_events(self, wid):
+        """
+        Adds the bind tag of the tool-tip event handlers to the given widget.
+        The handlers are bound to the tag only once for all widgets.
+        """
+        if not self.__class_bound:
+            wid.bind_class(TIP_BIND_TAG, "<Leave>", self.__evt_leave)
+            wid.bind_class(TIP_BIND_TAG, "<Motion>", self.__evt_motion)
+            self.__class_bound = True
+
+        tags = wid.bindtags()
+        if TIP_BIND_TAG not in tags:
+            wid.bindtags(tags[:1] + (TIP_BIND_TAG,) + tags[1:])
 
-        wid.bind("<Leave>", lambda e: self.__handle_leave())
-        wid.bind("<Motion>", lambda e: self.__handle_motion(wid, e.x, e.y, e.x_root, e.y_root, msg))
+
+    def __bind_menu_events(self, wid):
+        """
+        Binds the tool-tip event handlers directly to the given menu widget. Tk
+        copies these bindings to clones of the menu, which are used for display
+        in menu bars on X11. Bind tags are not used, as Tkinter cannot map the
+        path of a clone in events to a widget; instead the handler refers to the
+        original widget. Binding cannot be postponed, as clones are created only
+        once, when the menu is added to the menu bar.
+        """
+        wid.bind("<Leave>", self.__evt_leave)
+        wid.bind("<Motion>", lambda event: self.__handle_motion(
+            wid, event.x, event.y, event.x_root, event.y_root, wid.tooltip_msg))
+
+
+    def __evt_leave(self, _event):
+        """ Handler for Leave event: the same handler is bound for all widgets. """
+        self.__handle_leave()
+
+
+    def __evt_motion(self, event):
+        """
+        Handler for Motion event: the same handler is bound for all widgets. The
+        tool-tip text is retrieved from the widget receiving the event.
+        """
+        msg = getattr(event.widget, "tooltip_msg", None)
+        if msg:
+            self.__handle_motion(event.widget, event.x, event.y,
+                                 event.x_root, event.y_root, msg)
 
 
     def __handle_leave(self):
@@ -116,23 +205,39 @@ class ToolTipWidget:
             self.__destroy_window()
 
         # Update tool-tip text, if currently displayed and texts are generated by callable.
+        # The text is not queried again until the mouse moved by at least one character cell.
         if self.__wid_tip:
-            if callable(msg):
+            if (callable(msg) and
+                    (abs(wid_x - self.__cur_msg_x) + abs(wid_y - self.__cur_msg_y)
+                     >= tk_utils.font_normal_char_w)):
+                self.__cur_msg_x = wid_x
+                self.__cur_msg_y = wid_y
                 if msg(wid_x, wid_y) != self.__cur_msg:
                     self.__destroy_window()
                     self.__handle_timer(wid, wid_x, wid_y, wid_xroot, wid_yroot, msg)
 
         else:
-            # Mouse motion while tool-tip not yet shown: Start or restart delay timer
-            if self.__timer_id:
-                tk_utils.tk_top.after_cancel(self.__timer_id)
-
-            self.__timer_id = \
-                tk_utils.tk_top.after(1000, lambda: self.__handle_timer(wid, wid_x, wid_y,
-                                                                        wid_xroot, wid_yroot, msg))
+            # Mouse motion while tool-tip not yet shown: Start or restart delay timer. While the
+            # timer is pending, only time and position are updated, checked when it expires.
+            self.__motion_args = (wid, wid_x, wid_y, wid_xroot, wid_yroot, msg)
+            self.__motion_ts = time.monotonic()
+            if self.__timer_id is None:
+                self.__timer_id = tk_utils.tk_top.after(TIP_DELAY, self.__handle_delay)
             self.__wid_anchor = wid
 
 
+    def __handle_delay(self):
+        """
+        Handler for delay timer: Displays the tool-tip if the mouse did not move
+        within the delay; else the timer is restarted with the remaining time.
+        """
+        remaining = TIP_DELAY - int((time.monotonic() - self.__motion_ts) * 1000)
+        if remaining > 0:
+            self.__timer_id = tk_utils.tk_top.after(remaining, self.__handle_delay)
+        else:
+            self.__handle_timer(*self.__motion_args)
+
+
     def __handle_timer(self, wid, wid_x, wid_y, wid_xroot, wid_yroot, msg):
         """
         Handler for delay timer: Create the overlay widget and display the help text.
@@ -145,6 +250,8 @@ class ToolTipWidget:
             if not msg:
                 return
             self.__cur_msg = msg
+            self.__cur_msg_x = wid_x
+            self.__cur_msg_y = wid_y
 
         self.__destroy_window()
         self.__create_window(msg)
@@ -161,13 +268,13 @@ class ToolTipWidget:
         self.__wid_tip.wm_overrideredirect(1)
         self.__wid_tip.wm_withdraw()
 
-        char_w = tk_utils.font_normal.measure("0")
+        char_w = tk_utils.font_normal_char_w
         wid_lab = tk.Message(self.__wid_tip, borderwidth=1, relief=tk.SUNKEN, bg="#FFFFA0",
                              text=msg, font=tk_utils.font_normal, anchor=tk.W, justify=tk.LEFT,
                              width=60*char_w)
         wid_lab.pack()
 
-        wid_lab.bind("<Leave>", lambda e: self.__handle_leave())
+        wid_lab.bind("<Leave>", self.__evt_leave)
 
 
     def __map_window(self, coord_x, coord_y):
@@ -182,18 +289,21 @@ class ToolTipWidget:
 
         # Window might have been destroyed while waiting
         if tk_utils.wid_exists(self.__wid_tip):
+            wid_w = self.__wid_tip.winfo_reqwidth()
+            wid_h = self.__wid_tip.winfo_reqheight()
+            if self.__screen_size is None:
+                self.__screen_size = (self.__wid_tip.winfo_screenwidth(),
+                                      self.__wid_tip.winfo_screenheight())
+            root_w, root_h = self.__screen_size
+
             coord_x += 10
-            coord_y -= 10 + self.__wid_tip.winfo_reqheight()
+            coord_y -= 10 + wid_h
 
-            wid_w = self.__wid_tip.winfo_reqwidth()
-            root_w = self.__wid_tip.winfo_screenwidth()
             if coord_x + wid_w > root_w:
                 coord_x = root_w - wid_w
             if coord_x < 0:
                 coord_x = 0
 
-            wid_h = self.__wid_tip.winfo_reqheight()
-            root_h = self.__wid_tip.winfo_screenheight()
             if coord_y + wid_h > root_h:
                 coord_y = root_h - wid_h
             if coord_y < 0:
@@ -202,9 +312,12 @@ class ToolTipWidget:
             self.__wid_tip.wm_geometry("+%d+%d" % (coord_x, coord_y))
             self.__wid_tip.wm_deiconify()
 
-        # Enable handler for leave event only after the widget is mapped
-        if self.__wid_tip:
-            self.__wid_tip.update()
+            # Enable handler for leave event only after the widget is mapped. Note
+            # update_idletasks() would not suffice, as Leave events caused by mapping
+            # the window need to be received from the window system.
+            if self.__wid_tip:
+                self.__wid_tip.update()
+
         self.__under_construction = False
 
 
@@ -231,7 +344,11 @@ class Menu(tk.Menu):  # pylint: disable=too-many-ancestors
     regular widgets.
     """
     def __init__(self, parent, **kwargs):
-        self.tooltip = {}
+        # Tool-tip keys or callables indexed by menu entry index, or None
+        self.tooltip = []
+        # Vertical extent and tool-tip text or callable of the entry at the last
+        # queried position, or None
+        self.tooltip_pos = None
         super().__init__(parent, **kwargs)
         tool_tip_add(self, self.__get_tool_tip)
 
@@ -239,23 +356,62 @@ class Menu(tk.Menu):  # pylint: disable=too-many-ancestors
     def __get_tool_tip(self, xcoo, ycoo):
         # abstract interface: unused parameter may be needed by other classes
         # pylint: disable=unused-argument
-        idx = super().index("@" + str(ycoo))
-        key = self.tooltip.get(idx, None)
+        # Tk is queried only when the mouse moves outside of the previous entry
+        if self.tooltip_pos and (self.tooltip_pos[0] <= ycoo < self.tooltip_pos[1]):
+            key = self.tooltip_pos[2]
+        else:
+            idx = super().index("@%d" % ycoo)
+            if (idx is not None) and (idx < len(self.tooltip)):
+                key = self.tooltip[idx]
+            else:
+                key = None
+            if key and not callable(key):
+                key = _get_tip_text(key)
+
+            if idx is not None:
+                ypos_1 = super().yposition(idx)
+                if idx < super().index("end"):
+                    ypos_2 = super().yposition(idx + 1)
+                else:
+                    ypos_2 = self.winfo_height()
+                self.tooltip_pos = (ypos_1, ypos_2, key)
 
         if not key:
             return ""
 
+        # Texts generated by callables may change, so these are not cached
         if callable(key):
             return key()
 
-        return re.sub(r"\n", " ", TOOL_TIP_DB[key].strip())
+        return key
 
 
     def __install_tool_tip(self, kwargs, tooltip):
         if tooltip:
             idx = super().index(kwargs["label"])
+            if idx >= len(self.tooltip):
+                self.tooltip.extend([None] * (idx + 1 - len(self.tooltip)))
             self.tooltip[idx] = tooltip
 
+
+    def add(self, *args, **kwargs):
+        """ Overloads the like-named Menu command to invalidate cached entry positions. """
+        self.tooltip_pos = None
+        super().add(*args, **kwargs)
+
+
+    def insert(self, *args, **kwargs):
+        """ Overloads the like-named Menu command to invalidate cached entry positions. """
+        self.tooltip_pos = None
+        super().insert(*args, **kwargs)
+
+
+    def delete(self, *args, **kwargs):
+        """ Overloads the like-named Menu command to invalidate cached entry positions. """
+        self.tooltip_pos = None
+        super().delete(*args, **kwargs)
+
+
     def add_command(self, cnf=(), **kwargs):
         """ Overloads the like-named Menu command to add a "tooltip" parameter. """
         tooltip = kwargs.pop("tooltip", None)
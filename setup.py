@@ -1,49 +1,65 @@
 #!/usr/bin/env python3
 
 #from distutils.core import setup
-from setuptools import setup
 import os
-import subprocess
 import sys
 
-if os.path.exists('doc/pod2help.py'):
-    proc_rst = subprocess.run(['doc/pod2help.py', "-rst", 'doc/gtest_gui.pod'],
-                              stdout=subprocess.PIPE, text=True, check=True)
-    long_description = proc_rst.stdout
-else:
-    long_description = None
-
-setup(
-    name='mote-gtest-gui',
-    version='0.9.0',
-    packages=['gtest_gui'],
-    scripts=['bin/gtest_gui'],
+from setuptools import setup
+from setuptools.command.sdist import sdist
 
-    install_requires=['trowser',
-                      'appdirs ; platform_system=="Windows"'],
+# Long description in RST format, generated from POD documentation only when
+# building a source distribution, which includes the generated file. When
+# building from a plain source tree, README.md is used instead.
+DOC_DIR = 'doc'
+POD_FILE = os.path.join(DOC_DIR, 'gtest_gui.pod')
+RST_FILE = os.path.join(DOC_DIR, 'gtest_gui.rst')
+POD_CONVERTER = os.path.join(DOC_DIR, 'pod2help.py')
 
-    author='T. Zoerner',
-    author_email='tomzox@gmail.com',
+class SdistWithRst(sdist):
+    """ Source distribution command that first generates the RST description. """
+    def run(self):
+        if not is_rst_up_to_date():
+            # imported here as they are not needed for any other command
+            # pylint: disable=import-outside-toplevel
+            import contextlib
+            import runpy
+            # The converter script is executed within this interpreter, with its output
+            # written directly to the file, which is removed upon failure so that it is
+            # not mistaken as up-to-date. The script calls sys.exit() upon errors.
+            prev_argv = sys.argv
+            try:
+                with open(RST_FILE, 'w', encoding='utf-8') as file_obj, \
+                     contextlib.redirect_stdout(file_obj):
+                    sys.argv = [POD_CONVERTER, "-rst", POD_FILE]
+                    runpy.run_path(POD_CONVERTER, run_name='__main__')
+            except BaseException:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(RST_FILE)
+                raise
+            finally:
+                sys.argv = prev_argv
+            with open(RST_FILE, encoding='utf-8') as file_obj:
+                self.distribution.metadata.long_description = file_obj.read()
+            self.distribution.metadata.long_description_content_type = 'text/x-rst'
+        super().run()
 
-    url='https://github.com/tomzox/gtest_gui',
+def is_rst_up_to_date():
+    """ Check if the generated RST file is newer than the POD documentation. """
+    try:
+        return os.path.getmtime(RST_FILE) >= os.path.getmtime(POD_FILE)
+    except OSError:
+        return False
 
-    description="Module tester's Gtest GUI is a full-featured graphical user-interface " \
-                "to C++ test applications using the GoogleTest framework.",
+if os.path.exists(RST_FILE):
+    readme_file, readme_type = RST_FILE, 'text/x-rst'
+else:
+    readme_file, readme_type = 'README.md', 'text/markdown'
+with open(readme_file, encoding='utf-8') as readme_obj:
+    long_description = readme_obj.read()
 
+# Other package metadata is defined statically in pyproject.toml
+setup(
     long_description=long_description,
-    long_description_content_type='text/x-rst',
-
-    classifiers=[
-          'Topic :: Software Development :: Testing',
-          'Development Status :: 5 - Production/Stable',
-          'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
-          'Programming Language :: Python :: 3',
-          'Operating System :: POSIX',
-          'Operating System :: Microsoft :: Windows',
-          'Environment :: X11 Applications',
-          'Environment :: Win32 (MS Windows)',
-          'Intended Audience :: Developers',
-          ],
-    keywords=['google-test', 'gtest', 'testing-tools', 'test-runners', 'tkinter', 'GUI'],
-    platforms=['posix', 'win32'],
+    long_description_content_type=readme_type,
+    cmdclass={'sdist': SdistWithRst},
 )